@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Case Cache - In-memory TTL cache of case search results
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from records import CaseRecord
+
+
+class CaseCache:
+    """Bounded LRU cache of successful case searches with a per-entry TTL.
+
+    Only case details are worth caching: listing_info is recomputed on every
+    hit by the scraper, so a cached case never reports a stale listing.
+    Found cases are held as CaseRecord rather than nested dicts to keep a
+    full cache small.
+    """
+
+    def __init__(self, ttl=1800, max_entries=50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pack(value):
+        if value.get('case_found') and 'case_details' in value:
+            return CaseRecord.from_dict(value)
+        return dict(value)
+
+    @staticmethod
+    def _unpack(value):
+        return value.to_dict() if isinstance(value, CaseRecord) else dict(value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return self._unpack(value)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, self._pack(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def dump_state(self):
+        """Unexpired entries as (key, expires, value) for snapshots"""
+        now = time.time()
+        with self._lock:
+            return [(key, expires, self._unpack(value))
+                    for key, (expires, value) in self._entries.items() if expires > now]
+
+    def restore_state(self, entries):
+        """Load entries from dump_state, dropping any that expired while saved"""
+        now = time.time()
+        with self._lock:
+            for key, expires, value in entries:
+                if expires > now:
+                    self._entries[key] = (expires, self._pack(value))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
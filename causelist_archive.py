@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Cause List Archive - Compact binary history of cause lists, queried via mmap
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import struct
+from array import array
+from datetime import datetime
+from records import CauseListColumns
+
+MAGIC = b'ECLA'
+VERSION = 1
+
+# magic, version, reserved, records, strings,
+# offsets of: records, date index, string offsets, string data
+HEADER = struct.Struct('<4sHHIIQQQQ')
+# date (YYYYMMDD), case_no, serial_no, parties, court, court_name (string ids)
+RECORD = struct.Struct('<IIIIII')
+
+
+def _date_int(date):
+    return int(date.replace('-', ''))
+
+
+def _date_str(value):
+    value = str(value)
+    return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+
+
+def write_archive(path, cause_lists):
+    """Write cause lists (download_cause_list dicts) to a binary archive.
+
+    Strings are stored once in a sorted table, so string ids compare in the
+    same order as the strings. Records are sorted by (case_no, date), which
+    makes the record array itself the case-number index; a separate array of
+    record numbers sorted by date serves date-range queries.
+    """
+    rows = []
+    for cause_list in cause_lists:
+        date = _date_int(cause_list['date'])
+        court = cause_list.get('court') or ''
+        for case in cause_list.get('cases', []):
+            rows.append((case['case_no'], date, str(case.get('serial_no') or ''),
+                         case.get('parties') or '', court, case.get('court_name') or ''))
+
+    strings = sorted({value for row in rows for value in (row[0], row[2], row[3], row[4], row[5])})
+    ids = {value: i for i, value in enumerate(strings)}
+    rows.sort(key=lambda row: (ids[row[0]], row[1]))
+
+    records = bytearray(RECORD.size * len(rows))
+    for i, (case_no, date, serial, parties, court, court_name) in enumerate(rows):
+        RECORD.pack_into(records, i * RECORD.size, date, ids[case_no], ids[serial],
+                         ids[parties], ids[court], ids[court_name])
+
+    date_index = array('I', sorted(range(len(rows)), key=lambda i: rows[i][1]))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    string_offsets = array('Q', [0])
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+
+    off_records = HEADER.size
+    off_dates = off_records + len(records)
+    off_offsets = off_dates + len(date_index) * date_index.itemsize
+    off_data = off_offsets + len(string_offsets) * string_offsets.itemsize
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(rows), len(strings),
+                            off_records, off_dates, off_offsets, off_data))
+        f.write(records)
+        f.write(date_index.tobytes())
+        f.write(string_offsets.tobytes())
+        for data in encoded:
+            f.write(data)
+
+    return {'records': len(rows), 'strings': len(strings)}
+
+
+class CauseListArchive:
+    """Read-only view of a binary cause list archive through mmap.
+
+    Nothing is parsed up front; point and range queries binary-search the
+    mapped record array and only decode the rows they return.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.count, self.string_count,
+         self._off_records, self._off_dates, self._off_offsets, self._off_data) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a cause list archive (version {VERSION}): {path}")
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, i):
+        start, end = struct.unpack_from('<QQ', self._mm, self._off_offsets + i * 8)
+        return self._mm[self._off_data + start:self._off_data + end].decode('utf-8')
+
+    def _string_id(self, value):
+        """Binary search the sorted string table; None if value is absent"""
+        lo, hi = 0, self.string_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string(mid) < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.string_count and self._string(lo) == value:
+            return lo
+        return None
+
+    def _record(self, i):
+        return RECORD.unpack_from(self._mm, self._off_records + i * RECORD.size)
+
+    def _row(self, i):
+        date, case_no, serial, parties, court, court_name = self._record(i)
+        row = {
+            'date': _date_str(date),
+            'court': self._string(court),
+            'serial_no': self._string(serial),
+            'case_no': self._string(case_no),
+            'parties': self._string(parties)
+        }
+        name = self._string(court_name)
+        if name:
+            row['court_name'] = name
+        return row
+
+    def _lower_bound(self, key):
+        """First record whose (case_no id, date) >= key"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            date, case_no = self._record(mid)[:2]
+            if (case_no, date) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def case_history(self, case_no, start=None, end=None):
+        """Every listing of case_no, optionally limited to start..end (inclusive), oldest first"""
+        case_id = self._string_id(case_no)
+        if case_id is None:
+            return []
+        first = self._lower_bound((case_id, _date_int(start) if start else 0))
+        last = self._lower_bound((case_id, _date_int(end) + 1 if end else 1 << 32))
+        return [self._row(i) for i in range(first, last)]
+
+    def _date_at(self, position):
+        """(date, record number) at a position of the date index"""
+        record = struct.unpack_from('<I', self._mm, self._off_dates + position * 4)[0]
+        return self._record(record)[0], record
+
+    def _date_bound(self, date, upper=False):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._date_at(mid)[0]
+            if value < date or (upper and value == date):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def between(self, start, end=None):
+        """Every row listed from start to end (inclusive), in date order"""
+        first = self._date_bound(_date_int(start))
+        last = self._date_bound(_date_int(end or start), upper=True)
+        return [self._row(self._date_at(p)[1]) for p in range(first, last)]
+
+    def covers(self, date):
+        """True if the archive has any rows for date"""
+        value = _date_int(date)
+        position = self._date_bound(value)
+        return position < self.count and self._date_at(position)[0] == value
+
+
+class CauseListIndex:
+    """In-memory index of recently fetched cause lists, kept in a CauseListColumns store"""
+
+    def __init__(self):
+        self.dates = set()
+        self._store = CauseListColumns()
+
+    def has(self, date, court):
+        if self._store.has(date, court):
+            return True
+        # The binary archive stores a missing court as ''
+        return not court and (self._store.has(date, None) or self._store.has(date, ''))
+
+    def add(self, cause_list):
+        """Index a cause list, replacing any earlier copy of the same (date, court) list"""
+        self._store.add_cause_list(cause_list, replace=True)
+        self.dates.add(cause_list['date'])
+
+    def case_history(self, case_no, start=None, end=None):
+        """Listings of case_no from start to end (inclusive), oldest first"""
+        listings = []
+        for date, court, row in self._store.find_case(case_no):
+            if (start and date < start) or (end and date > end):
+                continue
+            listing = {
+                'date': date,
+                'court': court or None,
+                'serial_no': row.serial_no,
+                'case_no': row.case_no,
+                'parties': row.parties
+            }
+            if row.court_name:
+                listing['court_name'] = row.court_name
+            listings.append(listing)
+        listings.sort(key=lambda r: (r['date'], r['court'] or '', r['serial_no'] or ''))
+        return listings
+
+
+def load_json_cause_lists(patterns):
+    """Read cause_list_YYYYMMDD.json files matching the given paths/globs"""
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path) as f:
+                yield json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Binary cause list archive')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Build an archive from cause list JSON files')
+    build.add_argument('archive')
+    build.add_argument('files', nargs='+', help='cause_list_*.json files or globs')
+
+    query = subparsers.add_parser('query', help='Query an archive')
+    query.add_argument('archive')
+    query.add_argument('--case', help='Case number, e.g. CC/123/2024')
+    query.add_argument('--from', dest='start', help='Start date (YYYY-MM-DD)')
+    query.add_argument('--to', dest='end', help='End date (YYYY-MM-DD)')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = datetime.now()
+        result = write_archive(args.archive, load_json_cause_lists(args.files))
+        print(f"Wrote {result['records']} records ({result['strings']} strings) to {args.archive} "
+              f"in {(datetime.now() - started).total_seconds():.1f}s")
+        return
+
+    with CauseListArchive(args.archive) as archive:
+        if args.case:
+            rows = archive.case_history(args.case, args.start, args.end)
+        elif args.start:
+            rows = archive.between(args.start, args.end)
+        else:
+            print("Error: Provide --case and/or --from")
+            return
+        print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
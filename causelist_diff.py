@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Cause List Diff - Day-over-day diffing and delta storage for cause lists
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+
+_court_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _row_hash(row):
+    """Stable hash of a cause-list row, used to spot edited rows"""
+    return hashlib.sha1(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _serial_key(row):
+    serial = str(row.get('serial_no', ''))
+    return (0, int(serial), '') if serial.isdigit() else (1, 0, serial)
+
+
+def _row_key(row):
+    return row['case_no'], row.get('court_name')
+
+
+def _group_rows(cause_list):
+    """Rows grouped by (case_no, court_name); a case can be listed more than once in a list"""
+    groups = {}
+    for row in cause_list.get('cases', []):
+        groups.setdefault(_row_key(row), []).append(row)
+    return groups
+
+
+def _rows_differ(old_rows, new_rows):
+    return [_row_hash(r) for r in old_rows] != [_row_hash(r) for r in new_rows]
+
+
+def diff_cause_lists(old, new):
+    """Compare two cause lists for the same court in linear time.
+
+    Rows are keyed on (case_no, court_name), so a district list naming the
+    same case in two court rooms keeps both rows. Returns added and removed
+    rows, cases whose serial_no changed, and rows whose other fields changed.
+    When a key has several rows on either day and they differ, its old rows
+    are reported removed and its new rows added.
+    """
+    old_groups = _group_rows(old)
+    new_groups = _group_rows(new)
+
+    added = []
+    resequenced = []
+    changed = []
+    for key, rows in new_groups.items():
+        previous_rows = old_groups.get(key)
+        if previous_rows is None:
+            added.extend(rows)
+            continue
+        if len(previous_rows) > 1 or len(rows) > 1:
+            if _rows_differ(previous_rows, rows):
+                added.extend(rows)
+            continue
+        previous, row = previous_rows[0], rows[0]
+        if _row_hash(previous) == _row_hash(row):
+            continue
+        if previous.get('serial_no') != row.get('serial_no'):
+            move = {
+                'case_no': row['case_no'],
+                'old_serial_no': previous.get('serial_no'),
+                'new_serial_no': row.get('serial_no')
+            }
+            if key[1] is not None:
+                move['court_name'] = key[1]
+            resequenced.append(move)
+        # Compare without serial_no so a pure re-sequence is not also a change
+        if {k: v for k, v in previous.items() if k != 'serial_no'} != \
+                {k: v for k, v in row.items() if k != 'serial_no'}:
+            changed.append(row)
+
+    removed = []
+    for key, rows in old_groups.items():
+        new_rows = new_groups.get(key)
+        if new_rows is None or ((len(rows) > 1 or len(new_rows) > 1) and _rows_differ(rows, new_rows)):
+            removed.extend(rows)
+
+    return {
+        'from_date': old.get('date'),
+        'to_date': new.get('date'),
+        'court': new.get('court'),
+        'added': added,
+        'removed': removed,
+        'resequenced': resequenced,
+        'changed': changed
+    }
+
+
+def apply_diff(base, delta):
+    """Rebuild a cause list from the previous day's list and a delta"""
+    groups = {key: [dict(row) for row in rows] for key, rows in _group_rows(base).items()}
+
+    for row in delta['removed']:
+        rows = groups.get(_row_key(row), [])
+        if row in rows:
+            rows.remove(row)
+    for move in delta['resequenced']:
+        for row in groups.get((move['case_no'], move.get('court_name')), []):
+            row['serial_no'] = move['new_serial_no']
+    for row in delta['changed']:
+        groups[_row_key(row)] = [dict(row)]
+    for row in delta['added']:
+        groups.setdefault(_row_key(row), []).append(dict(row))
+
+    # Court rooms keep the order they first appeared in; rows are in serial order within each
+    rooms = {name: i for i, name in enumerate(dict.fromkeys(
+        row.get('court_name') for row in base.get('cases', []) + delta['added']))}
+    return {
+        'date': delta['to_date'],
+        'court': delta['court'],
+        'cases': sorted((row for rows in groups.values() for row in rows),
+                        key=lambda row: (rooms.get(row.get('court_name'), len(rooms)), _serial_key(row)))
+    }
+
+
+class CauseListStore:
+    """Store cause lists per court as periodic snapshots plus daily deltas.
+
+    Layout: <root>/<court>/<YYYY-MM-DD>.snapshot.json or .delta.json. A full
+    snapshot is written every `snapshot_every` stored days per court.
+    """
+
+    def __init__(self, root='cause_lists', snapshot_every=7):
+        self.root = Path(root)
+        self.snapshot_every = snapshot_every
+
+    def _court_dir(self, court):
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', court or 'unknown').strip('_').lower()
+        return self.root / slug
+
+    def _entries(self, court):
+        """Sorted (date, kind, path) for everything stored for a court"""
+        entries = []
+        court_dir = self._court_dir(court)
+        if court_dir.exists():
+            for path in court_dir.glob('*.json'):
+                date, kind = path.name[:-len('.json')].split('.', 1)
+                entries.append((date, kind, path))
+        return sorted(entries)
+
+    def dates(self, court):
+        """Dates stored for a court"""
+        return [date for date, _, _ in self._entries(court)]
+
+    def _lock(self, court):
+        """Per-court lock, shared by every store instance on the same root"""
+        key = str(self._court_dir(court).resolve())
+        with _locks_guard:
+            return _court_locks.setdefault(key, threading.Lock())
+
+    def save(self, cause_list):
+        """Store a cause list, as a delta against the previous stored day when possible.
+
+        Saving a date earlier than (or equal to) one already stored changes the
+        base of every later delta, so those later days are rebuilt and re-stored
+        on the new chain.
+        """
+        court = cause_list.get('court')
+        date = cause_list['date']
+
+        with self._lock(court):
+            later = [self.load(court, d) for d, _, _ in self._entries(court) if d > date]
+            result = self._write(cause_list)
+            for later_list in later:
+                self._write(later_list)
+        return result
+
+    def _write(self, cause_list):
+        court = cause_list.get('court')
+        date = cause_list['date']
+        court_dir = self._court_dir(court)
+        court_dir.mkdir(parents=True, exist_ok=True)
+
+        earlier = [e for e in self._entries(court) if e[0] < date]
+        since_snapshot = 0
+        for _, kind, _ in reversed(earlier):
+            if kind == 'snapshot':
+                break
+            since_snapshot += 1
+
+        # Drop anything already stored for this date before rewriting it
+        for kind in ('snapshot', 'delta'):
+            (court_dir / f"{date}.{kind}.json").unlink(missing_ok=True)
+
+        if not earlier or since_snapshot + 1 >= self.snapshot_every:
+            path = court_dir / f"{date}.snapshot.json"
+            payload = cause_list
+            delta = None
+        else:
+            previous = self.load(court, earlier[-1][0])
+            delta = diff_cause_lists(previous, cause_list)
+            path = court_dir / f"{date}.delta.json"
+            payload = delta
+
+        with open(path, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+
+        return {'success': True, 'filename': str(path), 'delta': delta}
+
+    def load(self, court, date):
+        """Rebuild the cause list for a court and date"""
+        entries = [e for e in self._entries(court) if e[0] <= date]
+        if not entries or entries[-1][0] != date:
+            return None
+
+        # Walk back to the nearest snapshot, then replay deltas forward
+        start = len(entries) - 1
+        while start > 0 and entries[start][1] != 'snapshot':
+            start -= 1
+
+        with open(entries[start][2]) as f:
+            cause_list = json.load(f)
+        for _, _, path in entries[start + 1:]:
+            with open(path) as f:
+                cause_list = apply_diff(cause_list, json.load(f))
+        return cause_list
+
+    def changes(self, court, date):
+        """Return the stored delta for a court and date, computing it for snapshot days"""
+        entries = self._entries(court)
+        for i, (entry_date, kind, path) in enumerate(entries):
+            if entry_date != date:
+                continue
+            if kind == 'delta':
+                with open(path) as f:
+                    return json.load(f)
+            if i == 0:
+                return None
+            return diff_cause_lists(self.load(court, entries[i - 1][0]), self.load(court, date))
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two cause list JSON files')
+    parser.add_argument('old', help='Earlier cause_list_YYYYMMDD.json')
+    parser.add_argument('new', help='Later cause_list_YYYYMMDD.json')
+
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    delta = diff_cause_lists(old, new)
+    print(f"Added: {len(delta['added'])}")
+    print(f"Removed: {len(delta['removed'])}")
+    print(f"Re-sequenced: {len(delta['resequenced'])}")
+    print(f"Changed: {len(delta['changed'])}")
+    print(json.dumps(delta, indent=2))
+
+if __name__ == "__main__":
+    main()
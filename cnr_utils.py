@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+CNR helpers - normalize, validate, dedupe and route bulk CNR inputs
+"""
+
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+# CNR layout: SS DD EE NNNNNN YYYY
+# (state, district, establishment, case serial, filing year) e.g. DLCT011234562024
+CNR_PATTERN = re.compile(r'^([A-Z]{2})([A-Z]{2})(\d{2})(\d{6})(\d{4})$')
+_SEPARATORS = re.compile(r'[\s\-/._]+')
+# State, district and establishment code up front: meant as a CNR even if malformed
+_CNR_SHAPED = re.compile(r'^[A-Za-z]{4}\d{2}')
+
+
+def normalize_cnr(raw):
+    """Return the canonical 16-character CNR, or None if raw is not a valid CNR"""
+    if not raw:
+        return None
+    cnr = _SEPARATORS.sub('', str(raw)).upper()
+    match = CNR_PATTERN.match(cnr)
+    if not match:
+        return None
+    year = int(match.group(5))
+    if year < 1950 or year > datetime.now().year + 1:
+        return None
+    return cnr
+
+
+def looks_like_cnr(raw):
+    """True if raw is written like a CNR (DLCT01...), valid or not, rather than a case number"""
+    return bool(raw) and bool(_CNR_SHAPED.match(str(raw).strip()))
+
+
+def format_cnr(cnr):
+    """Format a canonical CNR for display (DLCT01-123456-2024)"""
+    return f"{cnr[:6]}-{cnr[6:12]}-{cnr[12:]}"
+
+
+def establishment_key(cnr):
+    """(state, district, establishment) prefix of a canonical CNR"""
+    return cnr[:2], cnr[2:4], cnr[4:6]
+
+
+def establishment_route(cnr, routes=None):
+    """Return the state_code/dist_code to query for a CNR.
+
+    routes maps a CNR prefix - the 6-character establishment ('DLCT01'),
+    4-character district ('DLCT') or 2-character state ('DL') - to eCourts'
+    numeric codes, {'state_code': ..., 'dist_code': ...}; the longest match
+    wins. The CNR's letters are not eCourts codes, so unmapped CNRs get
+    empty codes and the lookup relies on the CNR alone.
+    """
+    for length in (6, 4, 2):
+        if routes and cnr[:length] in routes:
+            route = {'state_code': '', 'dist_code': ''}
+            route.update(routes[cnr[:length]])
+            return route
+    return {'state_code': '', 'dist_code': ''}
+
+
+def load_routes(path):
+    """Read a routes table (CNR prefix -> {'state_code', 'dist_code'}) from JSON"""
+    with open(path, encoding='utf-8') as f:
+        routes = json.load(f)
+    return {prefix.upper(): route for prefix, route in routes.items()}
+
+
+def prepare_cnrs(raw_cnrs):
+    """Normalize and dedupe CNRs, keeping first-seen order.
+
+    Returns {'valid': [...], 'invalid': [...], 'duplicates': n}.
+    """
+    valid = []
+    invalid = []
+    seen = set()
+    duplicates = 0
+
+    for raw in raw_cnrs:
+        cnr = normalize_cnr(raw)
+        if cnr is None:
+            invalid.append(raw)
+        elif cnr in seen:
+            duplicates += 1
+        else:
+            seen.add(cnr)
+            valid.append(cnr)
+
+    return {'valid': valid, 'invalid': invalid, 'duplicates': duplicates}
+
+
+def group_by_establishment(cnrs):
+    """Group canonical CNRs by establishment prefix"""
+    groups = {}
+    for cnr in cnrs:
+        groups.setdefault(cnr[:6], []).append(cnr)
+    return groups
+
+
+def read_cnr_file(path):
+    """Read raw CNR values from a text or CSV file (one or more per line)"""
+    values = []
+    for line in Path(path).read_text(encoding='utf-8-sig').splitlines():
+        for cell in re.split(r'[,;\t]', line):
+            cell = cell.strip().strip('"\'')
+            if cell:
+                values.append(cell)
+    return values
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Adaptive (AIMD) concurrency limit for bulk upstream work
+"""
+
+import threading
+
+
+class AIMDLimiter:
+    """Concurrency limit that grows additively while upstream is healthy and
+    shrinks multiplicatively on timeouts and 5xx responses.
+
+    Bulk workers hold a slot (acquire/release) per work unit; upstream calls
+    report their outcome with record(). The limit rises by `increase` after a
+    full window of healthy calls (one per current slot) and is multiplied by
+    `decrease` at most once per window on overload, so one burst of failures
+    does not collapse it to the minimum.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, increase=1, decrease=0.5, latency_target=5.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._healthy = 0
+        self._since_decrease = 0
+        self._decreases = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def record(self, latency, overloaded=False):
+        """Report one upstream call: its latency (seconds) and whether it timed out or hit a 5xx"""
+        with self._cond:
+            self._since_decrease += 1
+            slow = self.latency_target is not None and latency > self.latency_target
+            if overloaded or slow:
+                self._healthy = 0
+                if self._since_decrease >= int(self._limit) or self._decreases == 0:
+                    self._limit = max(self.min_limit, self._limit * self.decrease)
+                    self._since_decrease = 0
+                    self._decreases += 1
+                return
+
+            self._healthy += 1
+            if self._healthy >= int(self._limit):
+                self._healthy = 0
+                self._limit = min(self.max_limit, self._limit + self.increase)
+                self._cond.notify_all()
+
+    def metrics(self):
+        with self._cond:
+            return {'limit': int(self._limit), 'in_flight': self._in_flight, 'decreases': self._decreases}
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Crawl Coordinator - Sharded work queue for spreading crawls across worker processes
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from ecourts_scraper import ECourtsScraper
+from causelist_diff import CauseListStore
+from priority_scheduler import BACKFILL, request_priority
+from cnr_utils import establishment_route, load_routes, prepare_cnrs, read_cnr_file
+
+CNR = 'cnr'
+CAUSE_LIST = 'cause_list'
+PDF = 'pdf'
+
+
+def cnr_units(cnrs, routes=None):
+    """CNR lookup units, sharded by state/district"""
+    units = []
+    for cnr in prepare_cnrs(cnrs)['valid']:
+        units.append({
+            'id': f"{CNR}:{cnr}",
+            'kind': CNR,
+            'shard': f"{cnr[:2]}/{cnr[2:4]}",
+            'payload': {'cnr': cnr, **establishment_route(cnr, routes)}
+        })
+    return units
+
+
+def cause_list_units(courts, dates):
+    """(court, date) cause list units; courts are dicts with state_code, dist_code and court"""
+    units = []
+    for court in courts:
+        for date in dates:
+            units.append({
+                'id': f"{CAUSE_LIST}:{court['state_code']}/{court['dist_code']}/{court.get('court', '')}:{date}",
+                'kind': CAUSE_LIST,
+                'shard': f"{court['state_code']}/{court['dist_code']}",
+                'payload': {**court, 'date': date}
+            })
+    return units
+
+
+def pdf_units(case_ids, shard=''):
+    units = []
+    for case_id in case_ids:
+        units.append({
+            'id': f"{PDF}:{case_id}",
+            'kind': PDF,
+            'shard': shard,
+            'payload': {'case_id': case_id}
+        })
+    return units
+
+
+class WorkQueue:
+    """Lease-based work queue stored in SQLite (a stand-in for a shared queue service).
+
+    A leased unit belongs to one worker until its lease expires; expired
+    leases go back to the pool so units held by a dead worker are retried.
+    The file is opened in WAL mode, which needs shared memory between the
+    processes using it: all workers must run on the same host, not against
+    a copy on a network filesystem.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        # WAL lets workers read while another worker holds the write lock
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+        with self._conn() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS units ('
+                'id TEXT PRIMARY KEY, kind TEXT, shard TEXT, payload TEXT, '
+                "status TEXT DEFAULT 'pending', owner TEXT, lease_expires REAL DEFAULT 0, "
+                'attempts INTEGER DEFAULT 0, result TEXT, error TEXT, updated REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS units_status ON units (status, shard)')
+
+    def _conn(self):
+        # One connection per thread; sqlite3 connections are not shareable by default
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    def enqueue(self, units):
+        """Add units; ones already queued (by id) are left untouched"""
+        now = time.time()
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO units (id, kind, shard, payload, updated) VALUES (?, ?, ?, ?, ?)',
+                [(u['id'], u['kind'], u['shard'], json.dumps(u['payload']), now) for u in units]
+            )
+            return conn.total_changes - before
+
+    def lease(self, worker_id, limit=10, lease_seconds=60, shards=None):
+        """Lease up to limit pending (or expired) units, optionally only from shards"""
+        now = time.time()
+        query = ("SELECT id, kind, shard, payload FROM units "
+                 "WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))")
+        params = [now]
+        if shards:
+            query += f" AND shard IN ({','.join('?' * len(shards))})"
+            params.extend(shards)
+        query += ' ORDER BY shard, id LIMIT ?'
+        params.append(limit)
+
+        with self._conn() as conn:
+            # A unit whose lease keeps expiring (e.g. it kills its worker) is given up on
+            conn.execute(
+                "UPDATE units SET status = 'failed', error = ?, updated = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                ('Lease expired on every attempt', now, now, self.max_attempts)
+            )
+            rows = conn.execute(query, params).fetchall()
+            conn.executemany(
+                "UPDATE units SET status = 'leased', owner = ?, lease_expires = ?, "
+                'attempts = attempts + 1, updated = ? WHERE id = ?',
+                [(worker_id, now + lease_seconds, now, row[0]) for row in rows]
+            )
+        return [{'id': r[0], 'kind': r[1], 'shard': r[2], 'payload': json.loads(r[3])} for r in rows]
+
+    def renew(self, worker_id, unit_ids, lease_seconds=60):
+        """Extend leases still held by worker_id"""
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                "UPDATE units SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND owner = ? AND status = 'leased'",
+                [(now + lease_seconds, now, unit_id, worker_id) for unit_id in unit_ids]
+            )
+
+    def complete(self, worker_id, unit_id, result):
+        """Store a result; ignored if the lease was lost to another worker"""
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "UPDATE units SET status = 'done', result = ?, error = NULL, updated = ? "
+                "WHERE id = ? AND owner = ? AND status = 'leased'",
+                (json.dumps(result), time.time(), unit_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, worker_id, unit_id, error):
+        """Release a failed unit for retry, or mark it failed after max_attempts"""
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                'error = ?, lease_expires = 0, updated = ? '
+                "WHERE id = ? AND owner = ? AND status = 'leased'",
+                (self.max_attempts, error, time.time(), unit_id, worker_id)
+            )
+
+    def results(self, kind=None):
+        """Yield (id, result) for completed units"""
+        query = "SELECT id, result FROM units WHERE status = 'done'"
+        params = []
+        if kind:
+            query += ' AND kind = ?'
+            params.append(kind)
+        with self._conn() as conn:
+            rows = conn.execute(query, params).fetchall()
+        for unit_id, result in rows:
+            yield unit_id, json.loads(result)
+
+    def stats(self):
+        """Unit counts by shard and status"""
+        with self._conn() as conn:
+            rows = conn.execute('SELECT shard, status, COUNT(*) FROM units GROUP BY shard, status').fetchall()
+        stats = {}
+        for shard, status, count in rows:
+            stats.setdefault(shard, {})[status] = count
+        return stats
+
+
+class _Transaction:
+    """Run a block inside BEGIN IMMEDIATE so lease selection and update are atomic"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+class CrawlWorker:
+    """Lease units from a WorkQueue, run them on a scraper and push results back"""
+
+    def __init__(self, queue, scraper=None, worker_id=None, shards=None, batch_size=10, lease_seconds=60):
+        self.queue = queue
+        self.scraper = scraper or ECourtsScraper()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.shards = shards
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self._held = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run_unit(self, unit):
+        with request_priority(BACKFILL):
+            return self._run_unit(unit)
+
+    def _run_unit(self, unit):
+        payload = unit['payload']
+        if unit['kind'] == CNR:
+            return self.scraper.search_case_by_cnr(payload['cnr'], payload['state_code'], payload['dist_code'])
+        if unit['kind'] == CAUSE_LIST:
+            return self.scraper.download_cause_list(payload['date'], payload.get('court'),
+                                                    payload['state_code'], payload['dist_code'])
+        if unit['kind'] == PDF:
+            return self.scraper.download_case_pdf(payload['case_id'])
+        return {'error': f"Unknown unit kind: {unit['kind']}"}
+
+    def _renew_loop(self):
+        # Renew at a third of the lease so a slow unit never loses its lease
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._held_lock:
+                held = list(self._held)
+            if held:
+                self.queue.renew(self.worker_id, held, self.lease_seconds)
+
+    def run(self, idle_exit=True, poll_interval=5):
+        """Process units until the queue is empty (or forever if idle_exit is False)"""
+        renewer = threading.Thread(target=self._renew_loop, daemon=True)
+        renewer.start()
+        processed = 0
+        try:
+            while not self._stop.is_set():
+                units = self.queue.lease(self.worker_id, self.batch_size, self.lease_seconds, self.shards)
+                if not units:
+                    if idle_exit:
+                        break
+                    self._stop.wait(poll_interval)
+                    continue
+
+                with self._held_lock:
+                    self._held.update(u['id'] for u in units)
+                for unit in units:
+                    try:
+                        result = self.run_unit(unit)
+                    except Exception as e:
+                        result = {'error': str(e)}
+                    if 'error' in result:
+                        self.queue.fail(self.worker_id, unit['id'], result['error'])
+                    else:
+                        self.queue.complete(self.worker_id, unit['id'], result)
+                    with self._held_lock:
+                        self._held.discard(unit['id'])
+                    processed += 1
+        finally:
+            self._stop.set()
+            renewer.join()
+        return processed
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='eCourts Crawl Coordinator')
+    parser.add_argument('--queue', default='crawl_queue.db', help='SQLite queue file (on a local disk)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = subparsers.add_parser('enqueue', help='Add work units to the queue')
+    enqueue.add_argument('--cnr-file', help='Text/CSV file of CNRs to look up')
+    enqueue.add_argument('--routes', help='JSON map of CNR prefix to eCourts state_code/dist_code')
+    enqueue.add_argument('--courts', help='JSON file listing courts ({"state_code", "dist_code", "court"})')
+    enqueue.add_argument('--dates', help='Comma-separated cause list dates (YYYY-MM-DD)')
+    enqueue.add_argument('--pdfs', help='Comma-separated case ids to download PDFs for')
+
+    work = subparsers.add_parser('work', help='Run a worker against the queue')
+    work.add_argument('--worker-id', help='Worker id (default: host-pid)')
+    work.add_argument('--shards', help='Comma-separated state/district shards to work on, e.g. DL/CT')
+    work.add_argument('--batch-size', type=int, default=10)
+    work.add_argument('--lease', type=int, default=60, help='Lease length in seconds')
+    work.add_argument('--forever', action='store_true', help='Keep polling when the queue is empty')
+    work.add_argument('--store', help='Store cause lists in DIR as daily deltas instead of writing each day in full')
+
+    subparsers.add_parser('status', help='Show queue progress per shard')
+
+    args = parser.parse_args()
+    queue = WorkQueue(args.queue)
+
+    if args.command == 'enqueue':
+        units = []
+        if args.cnr_file:
+            units.extend(cnr_units(read_cnr_file(args.cnr_file), load_routes(args.routes) if args.routes else None))
+        if args.courts and args.dates:
+            with open(args.courts) as f:
+                courts = json.load(f)
+            units.extend(cause_list_units(courts, args.dates.split(',')))
+        if args.pdfs:
+            units.extend(pdf_units(args.pdfs.split(',')))
+        added = queue.enqueue(units)
+        print(f"Queued {added} new units ({len(units) - added} already queued)")
+
+    elif args.command == 'work':
+        shards = args.shards.split(',') if args.shards else None
+        scraper = ECourtsScraper()
+        if args.store:
+            scraper.cause_list_store = CauseListStore(args.store)
+        worker = CrawlWorker(queue, scraper, worker_id=args.worker_id, shards=shards,
+                             batch_size=args.batch_size, lease_seconds=args.lease)
+        print(f"Worker {worker.worker_id} started")
+        try:
+            processed = worker.run(idle_exit=not args.forever)
+        except KeyboardInterrupt:
+            worker.stop()
+            return
+        print(f"Processed {processed} units")
+
+    else:
+        for shard, counts in sorted(queue.stats().items()):
+            summary = ', '.join(f"{status}: {count}" for status, count in sorted(counts.items()))
+            print(f"{shard or '-'}  {summary}")
+
+if __name__ == "__main__":
+    main()
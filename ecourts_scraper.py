@@ -4,40 +4,183 @@ eCourts Scraper - Fetch court listings from eCourts India
 """
 
 import requests
-import json
 import argparse
+import re
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
+from contextlib import nullcontext, redirect_stdout
+from sinks import StdoutSink, open_sink
+from transport import UpstreamError, open_transport
+from resilience import CircuitOpenError, endpoint_guards, hedged_call
+from concurrency import AIMDLimiter
+from priority_scheduler import BACKFILL, current_priority, request_priority, shared_scheduler
+from pdf_archive import PdfArchive
+from pdf_parser import parse_cause_list_pdf
+from causelist_archive import CauseListArchive, CauseListIndex
+from causelist_diff import CauseListStore
+from journal import CrawlJournal, run_journaled
+from cnr_utils import (establishment_route, format_cnr, group_by_establishment, load_routes, looks_like_cnr,
+                       normalize_cnr, prepare_cnrs, read_cnr_file)
+
+NOT_LISTED = {'listed': False, 'serial_no': None, 'court_name': None}
+
+# Default journal for --days/--from queries, holding the past cause lists they fetched
+WINDOW_JOURNAL = 'listing_window.journal'
+
+def index_cause_list(cause_list):
+    """Map case_no (and CNR, when rows carry one) -> listing entry for a cause list"""
+    index = {}
+    for case in cause_list.get('cases', []):
+        entry = {
+            'listed': True,
+            'serial_no': case.get('serial_no'),
+            'court_name': case.get('court_name') or cause_list.get('court')
+        }
+        index.setdefault(case.get('case_no'), entry)
+        cnr = normalize_cnr(case.get('cnr'))
+        if cnr:
+            index.setdefault(cnr, entry)
+    return index
+
+def _case_no(result):
+    details = result['case_details']
+    return f"{details['case_type']}/{details['case_number']}/{details['year']}"
 
 class ECourtsScraper:
-    def __init__(self):
+    def __init__(self, sink=None, transport=None):
         self.base_url = "https://services.ecourts.gov.in/ecourtindia_v6"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        # requests by default; see transport.open_transport for HTTP/2 and record/replay
+        self.transport = transport or open_transport()
+        self.session = getattr(self.transport, 'session', None)
+        # Optional ListingScheduler whose precomputed table answers listing lookups
+        self.listing_table = None
+        # Optional CauseListStore that keeps day-over-day deltas of downloaded lists
+        self.cause_list_store = None
+        # Cause lists fetched by this scraper, indexed for date-window queries,
+        # plus an optional CauseListArchive holding older history
+        self.cause_list_index = CauseListIndex()
+        self.cause_list_archive = None
+        # Optional CaseCache shared between scraper instances (e.g. web requests)
+        self.case_cache = None
+        # Optional PdfArchive; when set, PDFs are stored deduplicated instead of via the sink
+        self.pdf_archive = None
+        # Where results, cause lists and PDFs are written (see sinks.open_sink)
+        self.sink = sink or open_sink()
+        # Upstream tail-latency controls: hedge after this latency percentile,
+        # and fail fast per endpoint while eCourts is degraded (the breakers and
+        # latency trackers are shared process-wide, see resilience.endpoint_guards)
+        self.timeout = 30
+        self.hedge_percentile = 95
+        # Parallelism of bulk operations, adapted to upstream health
+        self.limiter = AIMDLimiter()
+        # Print the limiter's current limit every this many seconds during bulk runs (None: quiet)
+        self.report_interval = None
+        self.cnr_batch_size = 25
+        # Optional CNR prefix -> {'state_code', 'dist_code'} map (see cnr_utils.load_routes)
+        self.routes = None
+        # Uncached CNRs resolved per check_listings call; the rest are reported unresolved
+        self.max_cnr_resolutions = 100
+        # Indexed cause lists per (date, state_code, dist_code), fetched once per scraper
+        self._listing_indexes = {}
+        # Upstream rate/connection budget shared by every scraper on the machine;
+        # requests are granted by priority class (see priority_scheduler)
+        self.scheduler = shared_scheduler()
+    
+    def _post(self, endpoint, data):
+        """POST to an eCourts endpoint with hedging and a per-endpoint circuit breaker"""
+        url = f"{self.base_url}/{endpoint}"
+        breaker, tracker = endpoint_guards(url)
+        priority = current_priority()
+        latencies = []
+        
+        def admit(hedge):
+            # Every attempt holds its own slot, taken before its clock starts;
+            # a hedge is only sent if a slot is free right away
+            slot = self.scheduler.try_acquire(priority) if hedge else self.scheduler.acquire(priority)
+            return None if slot is None else lambda: self.scheduler.release(slot)
+        
+        def attempt():
+            start = time.monotonic()
+            try:
+                response = self.transport.post(url, data=data, timeout=self.timeout)
+            finally:
+                elapsed = time.monotonic() - start
+                latencies.append(elapsed)
+            if response.status_code >= 500:
+                raise UpstreamError(f"{response.status_code} from {endpoint}", response=response)
+            return response, elapsed
+        
+        try:
+            response, elapsed = breaker.call(hedged_call, attempt, tracker, self.hedge_percentile, admit=admit)
+        except (UpstreamError, CircuitOpenError, TimeoutError, requests.Timeout, requests.ConnectionError):
+            self.limiter.record(max(latencies, default=0.0), overloaded=True)
+            raise
+        # Upstream time of the winning attempt, without any wait for a slot
+        self.limiter.record(elapsed)
+        return response
+    
+    def _run_bulk(self, journal, units, work, batch=None):
+        """run_journaled on the bulk limiter, as backfill unless the caller set a priority"""
+        priority = current_priority(BACKFILL)
+        
+        def prioritized(unit):
+            with request_priority(priority):
+                return work(unit)
+        
+        stop = threading.Event()
+        if self.report_interval and units:
+            threading.Thread(target=self._report_limiter, args=(stop, len(units)), daemon=True).start()
+        try:
+            return run_journaled(journal, units, prioritized, self.limiter, batch)
+        finally:
+            stop.set()
     
-    def search_case_by_cnr(self, cnr):
+    def _report_limiter(self, stop, total):
+        started = time.monotonic()
+        while not stop.wait(self.report_interval):
+            metrics = self.limiter.metrics()
+            print(f"  [{time.monotonic() - started:.0f}s] {total} units: concurrency limit {metrics['limit']}, "
+                  f"in flight {metrics['in_flight']}, backoffs {metrics['decreases']}")
+    
+    def search_case_by_cnr(self, cnr, state_code='', dist_code=''):
         """Search case by CNR number"""
         try:
+            canonical = normalize_cnr(cnr)
+            if canonical and not (state_code or dist_code):
+                route = establishment_route(canonical, self.routes)
+                state_code, dist_code = route['state_code'], route['dist_code']
+            cache_key = f"cnr:{canonical or cnr}"
+            cached = self._cached_case(cache_key, state_code, dist_code)
+            if cached is not None:
+                return cached
+            
             # For demo purposes, return mock data instead of making real API call
             # In production, uncomment the lines below for real API calls
-            # url = f"{self.base_url}/case_status/case_status.php"
-            # data = {'cnr_number': cnr}
-            # response = self.session.post(url, data=data, timeout=30)
-            # return self._parse_case_response(response)
+            # data = {'cnr_number': cnr, 'state_code': state_code, 'dist_code': dist_code}
+            # response = self._post('case_status/case_status.php', data)
+            # result = self._parse_case_response(response)
             
-            return self._parse_case_response(None)
+            result = self._parse_case_response(None, state_code, dist_code)
+            if canonical and result.get('case_found'):
+                result['cnr'] = canonical
+            self._cache_case(cache_key, result)
+            return result
         except Exception as e:
             return {'error': f'CNR search failed: {str(e)}'}
     
     def search_case_by_details(self, case_type, case_number, year, state_code='', dist_code=''):
         """Search case by case details"""
         try:
+            cache_key = f"case:{case_type}/{case_number}/{year}"
+            cached = self._cached_case(cache_key, state_code, dist_code)
+            if cached is not None:
+                return cached
+            
             # For demo purposes, return mock data instead of making real API call
             # In production, uncomment the lines below for real API calls
-            # url = f"{self.base_url}/case_status/case_status.php"
             # data = {
             #     'case_type': case_type,
             #     'case_no': case_number,
@@ -45,11 +188,11 @@ class ECourtsScraper:
             #     'state_code': state_code,
             #     'dist_code': dist_code
             # }
-            # response = self.session.post(url, data=data, timeout=30)
-            # return self._parse_case_response(response)
+            # response = self._post('case_status/case_status.php', data)
+            # result = self._parse_case_response(response)
             
             # Return mock data with user's input
-            return {
+            result = {
                 'case_found': True,
                 'case_details': {
                     'case_type': case_type,
@@ -58,91 +201,429 @@ class ECourtsScraper:
                     'parties': f'State vs Aman Kumar',
                     'court': 'District Court Delhi'
                 },
-                'listing_info': self._check_listing_dates()
+                'listing_info': self._check_listing_dates(f"{case_type}/{case_number}/{year}", state_code, dist_code)
             }
+            self._cache_case(cache_key, result)
+            return result
         except Exception as e:
             return {'error': f'Case search failed: {str(e)}'}
     
-    def _parse_case_response(self, response):
+    def _cached_case(self, key, state_code='', dist_code=''):
+        """Return a cached search result with freshly computed listing_info, or None"""
+        if self.case_cache is None:
+            return None
+        result = self.case_cache.get(key)
+        if result is None:
+            return None
+        result['listing_info'] = self._check_listing_dates(_case_no(result), state_code, dist_code)
+        return result
+    
+    def _cache_case(self, key, result):
+        if self.case_cache is not None and result.get('case_found'):
+            self.case_cache.put(key, {k: v for k, v in result.items() if k != 'listing_info'})
+    
+    def search_cases_by_cnr(self, cnrs, routes=None, journal=None):
+        """Search many CNRs: normalize, drop duplicates and invalid entries, batch per establishment.
+        
+        Each batch is up to cnr_batch_size CNRs of one establishment, looked up
+        back to back by one worker; batches run in parallel.
+        """
+        prepared = prepare_cnrs(cnrs)
+        groups = group_by_establishment(prepared['valid'])
+        
+        units = []
+        batches = {}
+        for prefix, group in groups.items():
+            route = establishment_route(group[0], routes)
+            for i, cnr in enumerate(group):
+                key = f"cnr:{cnr}"
+                units.append((key, (cnr, route)))
+                batches[key] = (prefix, i // self.cnr_batch_size)
+        
+        done = self._run_bulk(journal, units, lambda unit: self.search_case_by_cnr(unit[0], **unit[1]),
+                              batch=lambda key, unit: batches[key])
+        results = {format_cnr(cnr): done[key] for key, (cnr, _) in units}
+        
+        return {
+            'results': results,
+            'invalid': prepared['invalid'],
+            'duplicates': prepared['duplicates'],
+            'establishments': len(groups)
+        }
+    
+    def _parse_case_response(self, response, state_code='', dist_code=''):
         """Parse case search response"""
         # For demo purposes, return mock successful data
         # In real implementation, would parse actual HTML/JSON response
+        case_details = {
+            'case_type': 'CC',
+            'case_number': '123',
+            'year': '2024',
+            'parties': 'State vs Rahul Verma',
+            'court': 'District Court Delhi'
+        }
+        case_no = f"{case_details['case_type']}/{case_details['case_number']}/{case_details['year']}"
         return {
             'case_found': True,
-            'case_details': {
-                'case_type': 'CC',
-                'case_number': '123',
-                'year': '2024',
-                'parties': 'State vs Rahul Verma',
-                'court': 'District Court Delhi'
-            },
-            'listing_info': self._check_listing_dates()
+            'case_details': case_details,
+            'listing_info': self._check_listing_dates(case_no, state_code, dist_code)
         }
     
-    def _check_listing_dates(self):
+    def _listing_index(self, date, state_code='', dist_code=''):
+        """index_cause_list of the cause list for a date and court, fetched once per scraper"""
+        key = (date, state_code, dist_code)
+        index = self._listing_indexes.get(key)
+        if index is None:
+            index = index_cause_list(self.fetch_cause_list(date, state_code=state_code, dist_code=dist_code))
+            self._listing_indexes[key] = index
+        return index
+    
+    def _check_listing_dates(self, case_no=None, state_code='', dist_code=''):
         """Check if case is listed today or tomorrow"""
         today = datetime.now().strftime('%Y-%m-%d')
         tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
         
-        # Mock data - in real implementation, would check actual listings
+        # Serve from the precomputed table when both days are available
+        if self.listing_table is not None and case_no:
+            listing_info = self.listing_table.listing_info(case_no, today, tomorrow)
+            if listing_info is not None:
+                return listing_info
+        
+        if not case_no:
+            return {'today': dict(NOT_LISTED), 'tomorrow': dict(NOT_LISTED)}
+        # Same cause-list index check_listings uses, so single and batch lookups agree
         return {
-            'today': {'listed': False, 'serial_no': None, 'court_name': None},
-            'tomorrow': {'listed': True, 'serial_no': '15', 'court_name': 'District Court Room 3'}
+            'today': dict(self._listing_index(today, state_code, dist_code).get(case_no, NOT_LISTED)),
+            'tomorrow': dict(self._listing_index(tomorrow, state_code, dist_code).get(case_no, NOT_LISTED))
         }
     
-    def download_case_pdf(self, case_id):
-        """Download case PDF if available"""
+    def check_listings(self, identifiers, date=None):
+        """Today/tomorrow listing_info for many CNRs or case numbers at once.
+        
+        Identifiers are grouped by court (a CNR's establishment through
+        self.routes; case numbers use the default list), each court's cause
+        lists for both days are fetched once and indexed, and every identifier
+        is then a dictionary lookup on case_no. Cause lists have no CNR
+        column, so CNRs are first resolved to case numbers through the case
+        cache or one batched backfill search of at most max_cnr_resolutions
+        CNRs; the rest are reported as unresolved, to be retried.
+        """
+        today = date or datetime.now().strftime('%Y-%m-%d')
+        try:
+            tomorrow = (datetime.strptime(today, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        except (TypeError, ValueError):
+            return {'error': 'Date must be YYYY-MM-DD'}
+        
+        results = {}
+        courts = {}
+        for identifier in identifiers:
+            if not isinstance(identifier, str) or not identifier.strip():
+                results[str(identifier)] = {'error': 'Invalid CNR or case number'}
+                continue
+            cnr = normalize_cnr(identifier)
+            if cnr is None and looks_like_cnr(identifier):
+                results[identifier] = {'error': 'Invalid CNR'}
+                continue
+            route = establishment_route(cnr, self.routes) if cnr else {'state_code': '', 'dist_code': ''}
+            courts[identifier] = (cnr, route['state_code'], route['dist_code'])
+        
+        try:
+            units = [(f"listing:{day}:{state}:{dist}", (day, state, dist))
+                     for state, dist in dict.fromkeys(court[1:] for court in courts.values())
+                     for day in (today, tomorrow)]
+            self._run_bulk(None, units, lambda unit: self._listing_index(*unit))
+            
+            def index(day, court):
+                return self._listing_index(day, court[1], court[2])
+            
+            case_nos, unresolved = self._resolve_cnrs(
+                [court[0] for court in courts.values() if court[0]
+                 and court[0] not in index(today, court) and court[0] not in index(tomorrow, court)])
+        except Exception as e:
+            return {'error': f'Listing check failed: {str(e)}'}
+        
+        for identifier, court in courts.items():
+            cnr = court[0]
+            key = cnr or identifier.strip()
+            if cnr in unresolved:
+                results[identifier] = {'error': 'CNR not resolved yet, retry shortly', 'unresolved': True}
+                continue
+            if cnr in case_nos:
+                key = case_nos[cnr]
+                if key is None:
+                    results[identifier] = {'error': 'CNR could not be resolved to a case number'}
+                    continue
+            results[identifier] = {
+                'today': dict(index(today, court).get(key, NOT_LISTED)),
+                'tomorrow': dict(index(tomorrow, court).get(key, NOT_LISTED))
+            }
+            if cnr:
+                results[identifier]['case_no'] = key
+        
+        return {'date': today, 'count': len(results), 'unresolved': len(unresolved), 'results': results}
+    
+    def _resolve_cnrs(self, cnrs):
+        """Map canonical CNRs to case numbers (None when not found): case cache first, then one bulk search.
+        
+        Returns (resolved, unresolved); CNRs beyond max_cnr_resolutions are left
+        unresolved. Lookups run as backfill so a large batch cannot take over
+        the interactive share of the upstream budget.
+        """
+        resolved = {}
+        missing = []
+        for cnr in dict.fromkeys(cnrs):
+            cached = self.case_cache.get(f"cnr:{cnr}") if self.case_cache is not None else None
+            if cached is not None:
+                resolved[cnr] = _case_no(cached)
+            else:
+                missing.append(cnr)
+        
+        missing, unresolved = missing[:self.max_cnr_resolutions], set(missing[self.max_cnr_resolutions:])
+        if missing:
+            with request_priority(BACKFILL):
+                found = self.search_cases_by_cnr(missing, self.routes)['results']
+            for cnr in missing:
+                result = found.get(format_cnr(cnr)) or {}
+                resolved[cnr] = _case_no(result) if result.get('case_found') else None
+        return resolved, unresolved
+    
+    def check_listing_window(self, case_no, start, end, journal=None):
+        """Every listing of case_no between start and end (YYYY-MM-DD, inclusive).
+        
+        Served by one range scan over the archive and the in-memory index.
+        Dates neither covers are fetched as backfill on the bulk limiter and
+        indexed; dates after tomorrow are skipped since their cause lists are
+        not published yet. With a journal, lists of past dates (which no
+        longer change) are kept in it, so a later run over the same window
+        replays them instead of fetching them again.
+        """
+        try:
+            first = datetime.strptime(start, '%Y-%m-%d')
+            last = datetime.strptime(end, '%Y-%m-%d')
+        except ValueError:
+            return {'error': 'Dates must be YYYY-MM-DD'}
+        if last < first:
+            return {'error': 'End date is before start date'}
+        
+        today = datetime.now().strftime('%Y-%m-%d')
+        published_until = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        window = [(first + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((last - first).days + 1)]
+        missing = [d for d in window
+                   if d <= published_until and d not in self.cause_list_index.dates
+                   and not (self.cause_list_archive and self.cause_list_archive.covers(d))]
+        
+        def fetch(date):
+            try:
+                return self.fetch_cause_list(date)
+            except Exception as e:
+                return {'error': str(e)}
+        
+        past = [(f"window:{d}", d) for d in missing if d < today]
+        recent = [(f"window:{d}", d) for d in missing if d >= today]
+        replayed = sum(1 for key, _ in past if journal is not None and journal.is_done(key))
+        try:
+            with request_priority(BACKFILL):
+                fetched = self._run_bulk(journal, past, fetch)
+                fetched.update(self._run_bulk(None, recent, fetch))
+        except Exception as e:
+            return {'error': f'Listing window check failed: {str(e)}'}
+        
+        failed = [d for key, d in past + recent if 'error' in fetched[key]]
+        if failed:
+            return {'error': f"Listing window check failed for {len(failed)} dates, "
+                             f"first {failed[0]}: {fetched['window:' + failed[0]]['error']}"}
+        for key, _ in past + recent:
+            self.cause_list_index.add(fetched[key])
+        
+        # A freshly fetched list supersedes the archived copy of the same (date, court)
+        listings = []
+        if self.cause_list_archive is not None:
+            listings = [row for row in self.cause_list_archive.case_history(case_no, start, end)
+                        if not self.cause_list_index.has(row['date'], row['court'])]
+        listings.extend(self.cause_list_index.case_history(case_no, start, end))
+        listings.sort(key=lambda row: (row['date'], row['court'] or '', row['serial_no'] or ''))
+        
+        return {
+            'case_no': case_no,
+            'from': start,
+            'to': end,
+            'fetched_dates': len(missing) - replayed,
+            'replayed_dates': replayed,
+            'listings': listings
+        }
+    
+    def download_case_pdf(self, case_id, cnr=None):
+        """Download case PDF if available.
+        
+        With a pdf_archive the PDF is archived under the case's CNR (cnr, or
+        case_id when that is a CNR); without a known CNR it is saved as a file.
+        """
         try:
             # Mock implementation - would fetch actual PDF
             pdf_content = b"Mock PDF content"
-            filename = f"case_{case_id}_{datetime.now().strftime('%Y%m%d')}.pdf"
+            cnr = normalize_cnr(cnr) or normalize_cnr(case_id)
+            if self.pdf_archive is not None and cnr:
+                stored = self.pdf_archive.put(pdf_content, cnr, 'case', datetime.now().strftime('%Y-%m-%d'))
+                return {'success': True, 'cnr': cnr, 'sha256': stored['sha256'], 'duplicate': not stored['new_blob']}
             
-            with open(filename, 'wb') as f:
-                f.write(pdf_content)
+            filename = f"case_{case_id}_{datetime.now().strftime('%Y%m%d')}.pdf"
+            filename = self.sink.write_bytes(pdf_content, filename)
             
             return {'success': True, 'filename': filename}
         except Exception as e:
             return {'error': f'PDF download failed: {str(e)}'}
     
-    def download_cause_list(self, date=None):
-        """Download entire cause list for specified date"""
+    def download_case_pdfs(self, case_ids, journal=None):
+        """Download PDFs for many cases, resuming from journal if given"""
+        units = [(f"pdf:{case_id}", case_id) for case_id in dict.fromkeys(case_ids)]
+        return self._run_bulk(journal, units, self.download_case_pdf)
+    
+    def fetch_cause_list(self, date=None, court=None, state_code='', dist_code=''):
+        """Fetch cause list for specified date (and optionally court) without saving it"""
+        if not date:
+            date = datetime.now().strftime('%Y-%m-%d')
+        
+        # Mock cause list data
+        # In production: data = {'state_code': state_code, 'dist_code': dist_code,
+        #                        'court_code': court, 'causelist_date': date}
+        return {
+            'date': date,
+            'court': court or 'District Court',
+            'cases': [
+                {'serial_no': '1', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar'},
+                {'serial_no': '2', 'case_no': 'CC/124/2024', 'parties': 'State vs Pintu Singh'},
+                {'serial_no': '15', 'case_no': 'CC/135/2024', 'parties': 'State vs Abhinav Sharma'}
+            ]
+        }
+    
+    def download_cause_list(self, date=None, court=None, state_code='', dist_code=''):
+        """Download entire cause list for specified date, optionally for one court"""
         if not date:
             date = datetime.now().strftime('%Y-%m-%d')
         
+        name = None
+        if court:
+            # One file per (state, district, court, date) so courts don't overwrite each other
+            slug = re.sub(r'[^A-Za-z0-9]+', '_', f"{state_code}_{dist_code}_{court}").strip('_').lower()
+            name = f"cause_list_{slug}_{date.replace('-', '')}.json"
+        
         try:
-            # Mock cause list data
-            cause_list = {
-                'date': date,
-                'court': 'District Court',
-                'cases': [
-                    {'serial_no': '1', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar'},
-                    {'serial_no': '2', 'case_no': 'CC/124/2024', 'parties': 'State vs Pintu Singh'},
-                    {'serial_no': '15', 'case_no': 'CC/135/2024', 'parties': 'State vs Abhinav Sharma'}
-                ]
-            }
-            
-            filename = f"cause_list_{date.replace('-', '')}.json"
-            with open(filename, 'w') as f:
-                json.dump(cause_list, f, indent=2)
-            
-            return {'success': True, 'filename': filename, 'data': cause_list}
+            return self._save_cause_list(self.fetch_cause_list(date, court, state_code, dist_code), name)
         except Exception as e:
             return {'error': f'Cause list download failed: {str(e)}'}
+    
+    def import_cause_list_pdf(self, path, date=None, court=None, workers=None):
+        """Parse a PDF cause list and save it like a downloaded one"""
+        if not date:
+            date = datetime.now().strftime('%Y-%m-%d')
+        
+        try:
+            unparsed = []
+            result = self._save_cause_list(parse_cause_list_pdf(path, date, court, workers, unparsed=unparsed))
+            # Lines that looked like case rows but did not parse, so dropped rows are visible
+            result['unparsed'] = unparsed
+            return result
+        except Exception as e:
+            return {'error': f'Cause list PDF parsing failed: {str(e)}'}
+    
+    def _save_cause_list(self, cause_list, name=None):
+        self.cause_list_index.add(cause_list)
+        if self.cause_list_store is not None:
+            # Stored as day-over-day deltas instead of a full copy per day
+            stored = self.cause_list_store.save(cause_list)
+            return {'success': True, 'filename': stored['filename'], 'data': cause_list, 'delta': stored['delta']}
+        
+        filename = name or f"cause_list_{cause_list['date'].replace('-', '')}.json"
+        filename = self.sink.write(cause_list, name=filename, kind='cause_list')
+        return {'success': True, 'filename': filename, 'data': cause_list}
+
+    def download_cause_lists(self, dates, journal=None):
+        """Download cause lists for many dates, resuming from journal if given"""
+        units = [(f"causelist:{date}", date) for date in dict.fromkeys(dates)]
+        return self._run_bulk(journal, units, self.download_cause_list)
 
 def main():
     parser = argparse.ArgumentParser(description='eCourts Scraper')
     parser.add_argument('--cnr', help='CNR number to search')
+    parser.add_argument('--cnr-file', help='Text/CSV file of CNR numbers to search in bulk')
+    parser.add_argument('--journal', help='Journal file for resuming an interrupted bulk search '
+                        f'(and for past cause lists of --days/--from queries, default {WINDOW_JOURNAL})')
+    parser.add_argument('--routes', help='JSON map of CNR prefix (e.g. DLCT01) to eCourts state_code/dist_code')
     parser.add_argument('--case-type', help='Case type')
     parser.add_argument('--case-number', help='Case number')
     parser.add_argument('--year', help='Case year')
     parser.add_argument('--today', action='store_true', help='Check today\'s listings')
     parser.add_argument('--tomorrow', action='store_true', help='Check tomorrow\'s listings')
+    parser.add_argument('--days', type=int, help='Check listings for the next N days (starting today)')
+    parser.add_argument('--from', dest='from_date', help='Check listings from this date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='to_date', help='Check listings up to this date (YYYY-MM-DD, default today)')
+    parser.add_argument('--archive', help='Binary cause list archive to use for past listings')
     parser.add_argument('--causelist', action='store_true', help='Download today\'s cause list')
+    parser.add_argument('--causelist-pdf', help='Parse a PDF cause list into the cause list JSON format')
+    parser.add_argument('--date', help='Cause list date (YYYY-MM-DD) for --causelist-pdf')
     parser.add_argument('--download-pdf', action='store_true', help='Download case PDF')
+    parser.add_argument('--pdf-archive', help='Store PDFs in a deduplicated archive directory')
+    parser.add_argument('--http2', action='store_true', help='Use the HTTP/2 transport (needs httpx[http2])')
+    parser.add_argument('--record', help='Record upstream traffic to a gzip cassette')
+    parser.add_argument('--replay', help='Replay upstream traffic from a gzip cassette')
+    parser.add_argument('--output', help='Output sink: json:DIR (default), FILE.jsonl, FILE.jsonl.gz, sqlite:FILE or - for stdout')
+    parser.add_argument('--store', help='Store cause lists in DIR as daily deltas instead of writing each day in full')
+    parser.add_argument('--report-interval', type=float, default=10,
+                        help='Seconds between concurrency-limit reports during bulk runs (0 to disable)')
     
     args = parser.parse_args()
     
-    scraper = ECourtsScraper()
+    try:
+        sink = open_sink(args.output)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    
+    try:
+        transport = open_transport(http2=args.http2, record=args.record, replay=args.replay)
+    except (ImportError, OSError) as e:
+        print(f"Error: {e}")
+        return
+    
+    # Keep stdout clean for the JSON lines when it is the sink
+    status = redirect_stdout(sys.stderr) if isinstance(sink, StdoutSink) else nullcontext()
+    with sink, status:
+        try:
+            run(args, ECourtsScraper(sink=sink, transport=transport))
+        finally:
+            transport.close()
+
+def run(args, scraper):
+    if args.pdf_archive:
+        scraper.pdf_archive = PdfArchive(args.pdf_archive)
+    if args.archive:
+        scraper.cause_list_archive = CauseListArchive(args.archive)
+    if args.store:
+        scraper.cause_list_store = CauseListStore(args.store)
+    if args.routes:
+        scraper.routes = load_routes(args.routes)
+    scraper.report_interval = args.report_interval or None
+    
+    if args.to_date and not args.from_date:
+        print("Error: --to requires --from")
+        return
+    if args.days is not None and args.days < 1:
+        print("Error: --days must be at least 1")
+        return
+    
+    # Parse a PDF cause list if requested
+    if args.causelist_pdf:
+        print(f"Parsing cause list PDF: {args.causelist_pdf}")
+        result = scraper.import_cause_list_pdf(args.causelist_pdf, args.date)
+        if 'error' in result:
+            print(f"Error: {result['error']}")
+        else:
+            print(f"Cause list saved to: {result['filename']}")
+            print(f"Total cases: {len(result['data']['cases'])}")
+            print(f"Unparsed rows: {len(result['unparsed'])}")
+            for line in result['unparsed']:
+                print(f"  {line}")
+        return
     
     # Download cause list if requested
     if args.causelist:
@@ -155,6 +636,26 @@ def main():
             print(f"Total cases: {len(result['data']['cases'])}")
         return
     
+    # Bulk CNR search
+    if args.cnr_file:
+        print(f"Searching CNRs from: {args.cnr_file}")
+        journal = CrawlJournal(args.journal) if args.journal else None
+        try:
+            result = scraper.search_cases_by_cnr(read_cnr_file(args.cnr_file), scraper.routes, journal=journal)
+        finally:
+            if journal:
+                journal.close()
+        print(f"Searched: {len(result['results'])} across {result['establishments']} establishments")
+        print(f"Duplicates dropped: {result['duplicates']}")
+        print(f"Invalid CNRs skipped: {len(result['invalid'])}")
+        print(f"Concurrency limit: {scraper.limiter.limit}")
+        for raw in result['invalid']:
+            print(f"  {raw}")
+        output_file = f"bulk_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        output_file = scraper.sink.write(result, name=output_file, kind='bulk_result')
+        print(f"\nResults saved to: {output_file}")
+        return
+    
     # Search case
     if args.cnr:
         print(f"Searching by CNR: {args.cnr}")
@@ -176,41 +677,66 @@ def main():
     
     listing_info = result['listing_info']
     
-    # Check today's listing
-    if args.today or not args.tomorrow:
-        today_info = listing_info['today']
-        print(f"\nToday's Listing:")
-        if today_info['listed']:
-            print(f"  Listed: YES")
-            print(f"  Serial No: {today_info['serial_no']}")
-            print(f"  Court: {today_info['court_name']}")
-        else:
-            print("  Listed: NO")
-    
-    # Check tomorrow's listing
-    if args.tomorrow or not args.today:
-        tomorrow_info = listing_info['tomorrow']
-        print(f"\nTomorrow's Listing:")
-        if tomorrow_info['listed']:
-            print(f"  Listed: YES")
-            print(f"  Serial No: {tomorrow_info['serial_no']}")
-            print(f"  Court: {tomorrow_info['court_name']}")
+    # Check an arbitrary date window, or today/tomorrow
+    window_query = args.days is not None or args.from_date
+    if window_query:
+        today = datetime.now().strftime('%Y-%m-%d')
+        if args.days:
+            start = today
+            end = (datetime.now() + timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
         else:
+            start, end = args.from_date, args.to_date or today
+        # Past cause lists are kept in the journal so the next query over them is offline
+        with CrawlJournal(args.journal or WINDOW_JOURNAL) as journal:
+            window = scraper.check_listing_window(_case_no(result), start, end, journal)
+        if 'error' in window:
+            print(f"Error: {window['error']}")
+            return
+        result['listing_window'] = window
+        
+        print(f"\nListings from {start} to {end}:")
+        if not window['listings']:
             print("  Listed: NO")
+        for listing in window['listings']:
+            court = listing.get('court_name') or listing['court']
+            print(f"  {listing['date']}  Serial No: {listing['serial_no']}  Court: {court}")
+    else:
+        # Check today's listing
+        if args.today or not args.tomorrow:
+            today_info = listing_info['today']
+            print(f"\nToday's Listing:")
+            if today_info['listed']:
+                print(f"  Listed: YES")
+                print(f"  Serial No: {today_info['serial_no']}")
+                print(f"  Court: {today_info['court_name']}")
+            else:
+                print("  Listed: NO")
+        
+        # Check tomorrow's listing
+        if args.tomorrow or not args.today:
+            tomorrow_info = listing_info['tomorrow']
+            print(f"\nTomorrow's Listing:")
+            if tomorrow_info['listed']:
+                print(f"  Listed: YES")
+                print(f"  Serial No: {tomorrow_info['serial_no']}")
+                print(f"  Court: {tomorrow_info['court_name']}")
+            else:
+                print("  Listed: NO")
     
     # Download PDF if requested
     if args.download_pdf:
         print("\nDownloading case PDF...")
-        pdf_result = scraper.download_case_pdf("test_case")
+        pdf_result = scraper.download_case_pdf("test_case", result.get('cnr'))
         if 'error' in pdf_result:
             print(f"PDF Error: {pdf_result['error']}")
+        elif 'sha256' in pdf_result:
+            print(f"PDF archived as: {pdf_result['sha256']}{' (duplicate)' if pdf_result['duplicate'] else ''}")
         else:
             print(f"PDF saved to: {pdf_result['filename']}")
     
     # Save results to JSON
     output_file = f"case_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, 'w') as f:
-        json.dump(result, f, indent=2)
+    output_file = scraper.sink.write(result, name=output_file, kind='case_result')
     print(f"\nResults saved to: {output_file}")
 
 if __name__ == "__main__":
@@ -8,7 +8,12 @@ from tkinter import ttk, messagebox, scrolledtext, filedialog
 import json
 from datetime import datetime
 from ecourts_scraper import ECourtsScraper
+from cnr_utils import format_cnr, prepare_cnrs, read_cnr_file
+from priority_scheduler import BACKFILL, request_priority
+import csv
+import queue
 import threading
+import time
 
 class ECourtGUI:
     def __init__(self, root):
@@ -101,7 +106,11 @@ class ECourtGUI:
         
         demo_btn = ttk.Button(buttons_frame, text="🎯 Run Demo", 
                              command=self.run_demo)
-        demo_btn.grid(row=0, column=2)
+        demo_btn.grid(row=0, column=2, padx=(0, 10))
+        
+        bulk_btn = ttk.Button(buttons_frame, text="📑 Bulk Search", 
+                             command=self.open_bulk_search)
+        bulk_btn.grid(row=0, column=3)
         
         # Results frame
         results_frame = ttk.LabelFrame(main_frame, text="📊 Results", padding="15")
@@ -254,7 +263,7 @@ class ECourtGUI:
                 
                 if self.download_pdf.get() and 'error' not in result:
                     self.update_status("Downloading PDF...")
-                    pdf_result = self.scraper.download_case_pdf("gui_case")
+                    pdf_result = self.scraper.download_case_pdf("gui_case", result.get('cnr'))
                     result['pdf_download'] = pdf_result
                 
                 self.root.after(0, lambda: self.display_result(result))
@@ -287,6 +296,9 @@ class ECourtGUI:
         
         threading.Thread(target=download_thread, daemon=True).start()
     
+    def open_bulk_search(self):
+        BulkSearchWindow(self.root, self.scraper)
+    
     def run_demo(self):
         # Import and run demo with mock data
         from demo import MockECourtsScraper
@@ -310,6 +322,302 @@ class ECourtGUI:
         
         threading.Thread(target=demo_thread, daemon=True).start()
 
+class BulkRunner:
+    """Run CNR searches on a bounded worker pool with pause/resume and cancel"""
+    
+    def __init__(self, scraper, cnrs, workers=4, on_result=None, on_done=None):
+        self.scraper = scraper
+        self.workers = workers
+        self.on_result = on_result
+        self.on_done = on_done
+        self.total = len(cnrs)
+        self.completed = 0
+        self.started_at = None
+        self._queue = queue.Queue()
+        for cnr in cnrs:
+            self._queue.put(cnr)
+        self._running = threading.Event()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._active = 0
+        # Time spent paused, excluded from the ETA
+        self._paused_at = None
+        self._paused_for = 0.0
+    
+    def start(self):
+        self.started_at = time.monotonic()
+        self._running.set()
+        self._active = self.workers
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def pause(self):
+        with self._lock:
+            if self._paused_at is None:
+                self._paused_at = time.monotonic()
+        self._running.clear()
+    
+    def resume(self):
+        with self._lock:
+            if self._paused_at is not None:
+                self._paused_for += time.monotonic() - self._paused_at
+                self._paused_at = None
+        self._running.set()
+    
+    @property
+    def paused(self):
+        return not self._running.is_set() and not self._cancelled.is_set()
+    
+    def cancel(self):
+        self._cancelled.set()
+        # Wake paused workers so they can exit
+        self._running.set()
+    
+    def eta(self):
+        """Seconds remaining based on the average active time per completed CNR, or None"""
+        if not self.completed or self.started_at is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            paused = self._paused_for + (now - self._paused_at if self._paused_at is not None else 0.0)
+        elapsed = now - self.started_at - paused
+        return elapsed / self.completed * (self.total - self.completed)
+    
+    def _work(self):
+        while not self._cancelled.is_set():
+            self._running.wait()
+            if self._cancelled.is_set():
+                break
+            try:
+                cnr = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.on_result:
+                self.on_result(cnr, None)
+            try:
+                # Yield the shared upstream budget to interactive searches
+                with request_priority(BACKFILL):
+                    result = self.scraper.search_case_by_cnr(cnr)
+            except Exception as e:
+                result = {'error': str(e)}
+            with self._lock:
+                self.completed += 1
+            if self.on_result:
+                self.on_result(cnr, result)
+        
+        with self._lock:
+            self._active -= 1
+            finished = self._active == 0
+        if finished and self.on_done:
+            self.on_done(self._cancelled.is_set())
+
+
+class BulkSearchWindow:
+    """Bulk CNR search: paste or import a list and track every row live"""
+    
+    COLUMNS = ('cnr', 'status', 'case', 'parties', 'today', 'tomorrow')
+    
+    def __init__(self, parent, scraper):
+        self.scraper = scraper
+        self.runner = None
+        self.results = {}
+        self.rows = {}
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("📑 Bulk CNR Search")
+        self.window.geometry("1000x650")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        frame = ttk.Frame(self.window, padding="15")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        input_frame = ttk.LabelFrame(frame, text="📋 CNR Numbers (paste or import)", padding="10")
+        input_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        self.input_text = scrolledtext.ScrolledText(input_frame, width=100, height=6, font=('Consolas', 10))
+        self.input_text.grid(row=0, column=0, columnspan=6, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Button(input_frame, text="📂 Import CSV/TXT", command=self.import_file).grid(row=1, column=0, padx=(0, 10))
+        ttk.Label(input_frame, text="Workers:").grid(row=1, column=1, padx=(0, 5))
+        self.workers_var = tk.IntVar(value=4)
+        ttk.Spinbox(input_frame, from_=1, to=16, width=5, textvariable=self.workers_var).grid(row=1, column=2, padx=(0, 10))
+        
+        self.start_btn = ttk.Button(input_frame, text="▶ Start", command=self.start)
+        self.start_btn.grid(row=1, column=3, padx=(0, 10))
+        self.pause_btn = ttk.Button(input_frame, text="⏸ Pause", command=self.toggle_pause, state=tk.DISABLED)
+        self.pause_btn.grid(row=1, column=4, padx=(0, 10))
+        self.cancel_btn = ttk.Button(input_frame, text="⏹ Cancel", command=self.cancel, state=tk.DISABLED)
+        self.cancel_btn.grid(row=1, column=5, padx=(0, 10))
+        self.export_btn = ttk.Button(input_frame, text="💾 Export", command=self.export, state=tk.DISABLED)
+        self.export_btn.grid(row=1, column=6)
+        
+        table_frame = ttk.LabelFrame(frame, text="📊 Results", padding="10")
+        table_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        
+        self.table = ttk.Treeview(table_frame, columns=self.COLUMNS, show='headings', height=15)
+        for column, heading, width in zip(self.COLUMNS,
+                                          ('CNR', 'Status', 'Case', 'Parties', 'Today', 'Tomorrow'),
+                                          (160, 90, 120, 260, 150, 150)):
+            self.table.heading(column, text=heading)
+            self.table.column(column, width=width, anchor=tk.W)
+        self.table.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.table.yview)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.table.configure(yscrollcommand=scrollbar.set)
+        
+        self.progress = ttk.Progressbar(frame, mode='determinate')
+        self.progress.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        self.status_var = tk.StringVar(value="Paste CNRs or import a file, then press Start")
+        ttk.Label(frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W).grid(
+            row=3, column=0, sticky=(tk.W, tk.E))
+        
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+        input_frame.columnconfigure(0, weight=1)
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+    
+    def import_file(self):
+        path = filedialog.askopenfilename(parent=self.window, title="Import CNR list",
+                                          filetypes=[("CSV/Text", "*.csv *.txt"), ("All files", "*.*")])
+        if path:
+            self.input_text.insert(tk.END, "\n".join(read_cnr_file(path)) + "\n")
+    
+    def start(self):
+        raw = [line for line in self.input_text.get(1.0, tk.END).replace(',', '\n').splitlines() if line.strip()]
+        prepared = prepare_cnrs(raw)
+        if not prepared['valid']:
+            messagebox.showerror("Error", "No valid CNR numbers found", parent=self.window)
+            return
+        
+        self.table.delete(*self.table.get_children())
+        self.results = {}
+        self.rows = {}
+        for cnr in prepared['valid']:
+            self.rows[cnr] = self.table.insert('', tk.END, values=(format_cnr(cnr), 'Queued', '', '', '', ''))
+        for raw_cnr in prepared['invalid']:
+            self.table.insert('', tk.END, values=(raw_cnr.strip(), 'Invalid', '', '', '', ''))
+        
+        self.progress.configure(maximum=len(prepared['valid']), value=0)
+        self.runner = BulkRunner(
+            self.scraper, prepared['valid'], workers=max(1, self.workers_var.get()),
+            on_result=lambda cnr, result: self._post(lambda: self.update_row(cnr, result)),
+            on_done=lambda cancelled: self._post(lambda: self.finish(cancelled))
+        )
+        
+        self.start_btn.configure(state=tk.DISABLED)
+        self.pause_btn.configure(state=tk.NORMAL, text="⏸ Pause")
+        self.cancel_btn.configure(state=tk.NORMAL)
+        self.export_btn.configure(state=tk.DISABLED)
+        self.status_var.set(f"Searching {len(prepared['valid'])} CNRs "
+                            f"({prepared['duplicates']} duplicates, {len(prepared['invalid'])} invalid skipped)")
+        self.runner.start()
+    
+    def _post(self, callback):
+        """Run callback on the Tk thread, unless the window has been closed meanwhile"""
+        def guarded():
+            if self.window.winfo_exists():
+                callback()
+        try:
+            self.window.after(0, guarded)
+        except (tk.TclError, RuntimeError):
+            pass  # window (or the whole app) already destroyed; workers are winding down
+    
+    def update_row(self, cnr, result):
+        item = self.rows[cnr]
+        if result is None:
+            self.table.set(item, 'status', 'Searching...')
+            return
+        
+        self.results[cnr] = result
+        if 'error' in result:
+            self.table.set(item, 'status', 'Error')
+            self.table.set(item, 'parties', result['error'])
+        else:
+            details = result.get('case_details', {})
+            listing = result.get('listing_info', {})
+            self.table.item(item, values=(
+                format_cnr(cnr),
+                'Found' if result.get('case_found') else 'Not found',
+                f"{details.get('case_type', '')}/{details.get('case_number', '')}/{details.get('year', '')}",
+                details.get('parties', ''),
+                self._listing_text(listing.get('today', {})),
+                self._listing_text(listing.get('tomorrow', {}))
+            ))
+        
+        runner = self.runner
+        self.progress.configure(value=runner.completed)
+        eta = runner.eta()
+        eta_text = f", ETA {int(eta // 60)}m {int(eta % 60)}s" if eta is not None else ""
+        state = " (paused)" if runner.paused else ""
+        self.status_var.set(f"{runner.completed}/{runner.total} done{eta_text}{state}")
+    
+    @staticmethod
+    def _listing_text(info):
+        if info.get('listed'):
+            return f"#{info.get('serial_no')} {info.get('court_name')}"
+        return "Not listed"
+    
+    def toggle_pause(self):
+        if not self.runner:
+            return
+        if self.runner.paused:
+            self.runner.resume()
+            self.pause_btn.configure(text="⏸ Pause")
+            self.status_var.set(f"{self.runner.completed}/{self.runner.total} done")
+        else:
+            self.runner.pause()
+            self.pause_btn.configure(text="▶ Resume")
+            self.status_var.set(f"{self.runner.completed}/{self.runner.total} done (paused)")
+    
+    def cancel(self):
+        if self.runner:
+            self.runner.cancel()
+            self.status_var.set("Cancelling...")
+    
+    def finish(self, cancelled):
+        for cnr, item in self.rows.items():
+            if cnr not in self.results:
+                self.table.set(item, 'status', 'Cancelled')
+        self.start_btn.configure(state=tk.NORMAL)
+        self.pause_btn.configure(state=tk.DISABLED, text="⏸ Pause")
+        self.cancel_btn.configure(state=tk.DISABLED)
+        self.export_btn.configure(state=tk.NORMAL if self.results else tk.DISABLED)
+        verb = "Cancelled" if cancelled else "Completed"
+        self.status_var.set(f"{verb}: {len(self.results)}/{self.runner.total} CNRs searched")
+    
+    def export(self):
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".csv",
+                                            initialfile=f"bulk_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+        if not path:
+            return
+        
+        try:
+            if path.endswith('.json'):
+                with open(path, 'w') as f:
+                    json.dump({format_cnr(cnr): result for cnr, result in self.results.items()}, f, indent=2)
+            else:
+                with open(path, 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(['CNR', 'Status', 'Case', 'Parties', 'Today', 'Tomorrow'])
+                    for item in self.table.get_children():
+                        writer.writerow(self.table.item(item, 'values'))
+            self.status_var.set(f"Exported to {path}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Export failed: {e}", parent=self.window)
+    
+    def close(self):
+        if self.runner:
+            self.runner.cancel()
+        self.window.destroy()
+
 def main():
     root = tk.Tk()
     app = ECourtGUI(root)
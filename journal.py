@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Crash-safe write-ahead journal for bulk scraper runs
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+
+
+class CrawlJournal:
+    """Append-only JSONL journal of work units (pending -> in_flight -> done).
+
+    Re-opening the same journal after a crash replays it: finished units keep
+    their stored result and are not fetched again, while units that were
+    pending or in flight are handed out again. Writes are fsync'd in batches
+    of `fsync_every` records or every `fsync_interval` seconds.
+    """
+
+    def __init__(self, path, fsync_every=50, fsync_interval=1.0):
+        self.path = str(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.state = {}
+        self.results = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('unterminated line')
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn write from a killed run; drop it and anything after it
+                    break
+                good += len(line)
+                key = entry['key']
+                if entry['op'] == DONE:
+                    # First completed result wins, later duplicates are dropped
+                    if self.state.get(key) != DONE:
+                        self.state[key] = DONE
+                        self.results[key] = entry.get('result')
+                elif self.state.get(key) != DONE:
+                    self.state[key] = entry['op']
+        if good != os.path.getsize(self.path):
+            os.truncate(self.path, good)
+
+    def _append(self, entries):
+        self._file.write(''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in entries))
+        self._unsynced += len(entries)
+        now = time.monotonic()
+        if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+            self._sync(now)
+
+    def _sync(self, now=None):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = now or time.monotonic()
+
+    def add(self, keys):
+        """Record new work units as pending; known units are left as they are"""
+        with self._lock:
+            new = [k for k in keys if k not in self.state]
+            for key in new:
+                self.state[key] = PENDING
+            if new:
+                self._append([{'op': PENDING, 'key': k} for k in new])
+
+    def start(self, key):
+        with self._lock:
+            if self.state.get(key) != DONE:
+                self.state[key] = IN_FLIGHT
+                self._append([{'op': IN_FLIGHT, 'key': key}])
+
+    def finish(self, key, result):
+        with self._lock:
+            if self.state.get(key) == DONE:
+                return
+            self.state[key] = DONE
+            self.results[key] = result
+            self._append([{'op': DONE, 'key': key, 'result': result}])
+
+    def is_done(self, key):
+        return self.state.get(key) == DONE
+
+    def remaining(self, keys):
+        """Keys that still need work (pending or in flight when the last run stopped)"""
+        return [k for k in keys if self.state.get(k) != DONE]
+
+    def summary(self):
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0}
+        for status in self.state.values():
+            counts[status] += 1
+        return counts
+
+    def compact(self):
+        """Rewrite the journal keeping one line per unit"""
+        with self._lock:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for key, status in self.state.items():
+                    entry = {'op': status if status == DONE else PENDING, 'key': key}
+                    if status == DONE:
+                        entry['result'] = self.results.get(key)
+                    f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_journaled(journal, units, work, limiter=None, batch=None):
+    """Run work(unit) for each (key, unit) pair, skipping units already done.
+
+    Returns {key: result} including results replayed from the journal.
+    Without a journal every unit is simply run. With a limiter (see
+    concurrency.AIMDLimiter) units run on threads, as many at a time as
+    the limiter currently allows. batch(key, unit) optionally names a batch
+    per unit; a batch's units run back to back on one thread, and batches
+    run in parallel.
+    """
+    if journal is not None:
+        journal.add([key for key, _ in units])
+
+    def run_unit(key, unit):
+        if journal is None:
+            return work(unit)
+        if journal.is_done(key):
+            return journal.results[key]
+        journal.start(key)
+        result = work(unit)
+        # Failed units stay open so the next run retries them
+        if not (isinstance(result, dict) and 'error' in result):
+            journal.finish(key, result)
+        return result
+
+    if limiter is None:
+        return {key: run_unit(key, unit) for key, unit in units}
+
+    def limited(key, unit):
+        with limiter:
+            return run_unit(key, unit)
+
+    batches = {}
+    for key, unit in units:
+        batches.setdefault(batch(key, unit) if batch else key, []).append((key, unit))
+
+    def run_batch(members):
+        return [(key, limited(key, unit)) for key, unit in members]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(limiter.max_limit, len(batches)))) as pool:
+        for future in [pool.submit(run_batch, members) for members in batches.values()]:
+            results.update(future.result())
+    return {key: results[key] for key, _ in units}
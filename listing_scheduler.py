@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Listing Scheduler - Precompute next-day listing status for watched cases
+"""
+
+import argparse
+import signal
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from ecourts_scraper import NOT_LISTED, ECourtsScraper, index_cause_list
+from priority_scheduler import WATCHLIST, request_priority
+from snapshots import SnapshotManager
+
+
+def load_watchlist(path):
+    """Read watched cases, one per line: a case number, optionally followed by
+    the court's eCourts codes ("CC/123/2024, 26, 8"). '#' comments are allowed.
+
+    Returns (case_no, state_code, dist_code) tuples; cases without codes are
+    checked against the default cause list.
+    """
+    watched = []
+    for line in Path(path).read_text().splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line:
+            fields = [field.strip() for field in line.split(',')] + ['', '']
+            watched.append(tuple(fields[:3]))
+    return watched
+
+
+def _court_of(entry):
+    """(case_no, (state_code, dist_code)) for a watchlist entry: a case number or a load_watchlist tuple"""
+    if isinstance(entry, str):
+        return entry, ('', '')
+    case_no, state_code, dist_code = (tuple(entry) + ('', ''))[:3]
+    return case_no, (state_code or '', dist_code or '')
+
+
+class ListingScheduler:
+    """Fetch cause lists once published and precompute listing_info for watched cases"""
+
+    def __init__(self, scraper=None, publish_time='19:30', retry_interval=900, keep_days=2):
+        self.scraper = scraper or ECourtsScraper()
+        self.publish_time = datetime.strptime(publish_time, '%H:%M').time()
+        self.retry_interval = retry_interval
+        self.keep_days = keep_days
+        # case_no -> (state_code, dist_code) of the court whose cause list it appears in
+        self.watched = {}
+        # date -> {case_no: listing entry}; only cases whose court list was fetched
+        self.table = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, *case_numbers, state_code='', dist_code=''):
+        """Add cases (listed in the court with these codes) to the watchlist"""
+        with self._lock:
+            self.watched.update((case_no, (state_code, dist_code)) for case_no in case_numbers)
+
+    def unwatch(self, *case_numbers):
+        """Remove cases from the watchlist"""
+        with self._lock:
+            for case_no in case_numbers:
+                self.watched.pop(case_no, None)
+
+    def set_watchlist(self, entries):
+        """Replace the watchlist (e.g. with the current contents of the watchlist file).
+
+        entries are case numbers or (case_no, state_code, dist_code) tuples.
+        """
+        with self._lock:
+            self.watched = dict(_court_of(entry) for entry in entries)
+
+    def _fetch_index(self, date, state_code, dist_code):
+        try:
+            cause_list = self.scraper.fetch_cause_list(date, state_code=state_code, dist_code=dist_code)
+        except Exception as e:
+            return {'error': str(e)}
+        return {'index': index_cause_list(cause_list)}
+
+    def precompute(self, date=None):
+        """Fetch each watched court's cause list for date (default tomorrow) and fill the table.
+
+        A case is only recorded as not listed when its own court's list was
+        fetched; cases of courts that failed keep their previous entry (or
+        none, so lookups fall back to a live check) and the run reports an
+        error so it is retried.
+        """
+        if not date:
+            date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+        with self._lock:
+            watched = dict(self.watched)
+
+        courts = {}
+        for case_no, court in watched.items():
+            courts.setdefault(court, []).append(case_no)
+        units = [(f"listing:{date}:{state}:{dist}", (state, dist)) for state, dist in courts]
+        with request_priority(WATCHLIST):
+            fetched = self.scraper._run_bulk(None, units, lambda court: self._fetch_index(date, *court))
+
+        entries = {}
+        failed = 0
+        for key, court in units:
+            if 'error' in fetched[key]:
+                failed += 1
+                continue
+            # Index once so each watched case is a dict lookup rather than a scan
+            index = fetched[key]['index']
+            for case_no in courts[court]:
+                entries[case_no] = index.get(case_no, dict(NOT_LISTED))
+
+        with self._lock:
+            previous = self.table.get(date, {})
+            entries.update((c, previous[c]) for c in watched if c not in entries and c in previous)
+            self.table[date] = entries
+            self._prune()
+
+        if failed:
+            return {'error': f'Listing precompute failed for {failed} of {len(units)} courts',
+                    'date': date, 'cases': len(entries)}
+        return {'success': True, 'date': date, 'cases': len(entries), 'courts': len(units)}
+
+    def _prune(self):
+        cutoff = (datetime.now() - timedelta(days=self.keep_days)).strftime('%Y-%m-%d')
+        for date in [d for d in self.table if d < cutoff]:
+            del self.table[date]
+
+    def lookup(self, case_no, date):
+        """Return the precomputed entry for case_no on date, or None"""
+        with self._lock:
+            entries = self.table.get(date)
+            if entries is None:
+                return None
+            if case_no in entries:
+                return dict(entries[case_no])
+            # A precomputed date only misses unwatched cases
+            return None
+
+    def listing_info(self, case_no, today=None, tomorrow=None):
+        """Return today/tomorrow listing_info from the table, or None if not precomputed"""
+        now = datetime.now()
+        today = today or now.strftime('%Y-%m-%d')
+        tomorrow = tomorrow or (now + timedelta(days=1)).strftime('%Y-%m-%d')
+
+        today_info = self.lookup(case_no, today)
+        tomorrow_info = self.lookup(case_no, tomorrow)
+        if today_info is None or tomorrow_info is None:
+            return None
+        return {'today': today_info, 'tomorrow': tomorrow_info}
+
+    def dump_state(self):
+        """Precomputed table for snapshots"""
+        with self._lock:
+            return {'table': {d: dict(e) for d, e in self.table.items()}}
+
+    def restore_state(self, state):
+        """Restore from dump_state, dropping dates that are no longer needed.
+
+        The watchlist is not restored: it always comes from the watchlist
+        file, so cases removed there stay removed across restarts.
+        """
+        with self._lock:
+            for date, entries in state.get('table', {}).items():
+                self.table.setdefault(date, entries)
+            self._prune()
+
+    def _covers(self, date):
+        """True if date's table was precomputed for exactly the current watchlist"""
+        with self._lock:
+            return date in self.table and set(self.table[date]) == set(self.watched)
+
+    def _next_run(self, now):
+        run_at = datetime.combine(now.date(), self.publish_time)
+        if now >= run_at:
+            run_at += timedelta(days=1)
+        return run_at
+
+    def _run(self):
+        now = datetime.now()
+        tomorrow = (now + timedelta(days=1)).strftime('%Y-%m-%d')
+        # Warm up on start so the first morning after a restart is not cold,
+        # skipping dates a restored snapshot already covers for the current watchlist
+        if not self._covers(now.strftime('%Y-%m-%d')):
+            self.precompute(now.strftime('%Y-%m-%d'))
+        if now.time() >= self.publish_time and not self._covers(tomorrow):
+            self.precompute()
+
+        while not self._stop.is_set():
+            wait = (self._next_run(datetime.now()) - datetime.now()).total_seconds()
+            if self._stop.wait(max(wait, 0)):
+                break
+            # Lists may be published late; retry until the fetch succeeds
+            while not self._stop.is_set():
+                result = self.precompute()
+                if 'error' not in result:
+                    break
+                self._stop.wait(self.retry_interval)
+
+    def start(self):
+        """Start the background precompute thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background precompute thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description='eCourts Listing Scheduler')
+    parser.add_argument('--watchlist', required=True,
+                        help='File with one case number per line, optionally followed by ", state_code, dist_code"')
+    parser.add_argument('--publish-time', default='19:30', help='Time (HH:MM) cause lists are published')
+    parser.add_argument('--once', action='store_true', help='Precompute tomorrow once and exit')
+    parser.add_argument('--snapshot', help='Snapshot file to restore on start and save periodically/on exit')
+
+    args = parser.parse_args()
+
+    scheduler = ListingScheduler(publish_time=args.publish_time)
+    scheduler.set_watchlist(load_watchlist(args.watchlist))
+
+    if args.once:
+        result = scheduler.precompute()
+        if 'error' in result:
+            print(f"Error: {result['error']}")
+        else:
+            print(f"Precomputed {result['cases']} cases for {result['date']}")
+        return
+
+    snapshots = None
+    if args.snapshot:
+        snapshots = SnapshotManager(args.snapshot)
+        snapshots.register('listings', scheduler.dump_state, scheduler.restore_state)
+        if snapshots.restore():
+            print(f"Restored precomputed listings from {args.snapshot}")
+        snapshots.start()
+
+    # Treat SIGTERM like Ctrl+C so the final snapshot is written
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    print(f"Watching {len(scheduler.watched)} cases, precomputing daily at {args.publish_time}")
+    scheduler.start()
+    try:
+        scheduler._thread.join()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    finally:
+        if snapshots:
+            snapshots.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Load generator for the web interface API (/api/search, /api/causelist)
+"""
+
+import argparse
+import json
+import logging
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from ecourts_scraper import ECourtsScraper
+from sinks import OutputSink
+
+DEFAULT_MIX = 'cnr=6,details=2,causelist=2'
+
+
+class _NullSink(OutputSink):
+    """Discard output so load runs do not fill the disk"""
+
+    def _write_batch(self, batch):
+        pass
+
+    def location(self, name):
+        return name or ''
+
+    def write_bytes(self, data, name, kind='pdf'):
+        return name
+
+
+class StubScraper(ECourtsScraper):
+    """Scraper that answers from mock data after an optional simulated upstream delay"""
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(sink=_NullSink())
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(random.expovariate(1 / self.latency))
+
+    def search_case_by_cnr(self, cnr, state_code='', dist_code=''):
+        self._delay()
+        return super().search_case_by_cnr(cnr, state_code, dist_code)
+
+    def search_case_by_details(self, case_type, case_number, year, state_code='', dist_code=''):
+        self._delay()
+        return super().search_case_by_details(case_type, case_number, year, state_code, dist_code)
+
+    def fetch_cause_list(self, date=None, court=None, state_code='', dist_code=''):
+        self._delay()
+        return super().fetch_cause_list(date, court, state_code, dist_code)
+
+
+def serve_stub(latency=0.0, port=0):
+    """Serve web_interface.app with StubScraper in this process, printing the base URL once listening"""
+    from werkzeug.serving import make_server
+    import web_interface
+
+    StubScraper.latency = latency
+    web_interface.app.config['SCRAPER_FACTORY'] = StubScraper
+    # Per-request access logs would cost the server more than the stubbed work
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', port, web_interface.app, threaded=True)
+    print(f"http://127.0.0.1:{server.server_port}", flush=True)
+    server.serve_forever()
+
+
+def start_stub_server(latency=0.0):
+    """Start the stubbed app in a child process; returns (base_url, process).
+
+    A separate process keeps the app from sharing the GIL with the load
+    generator's client threads, which would otherwise skew both sides.
+    """
+    process = subprocess.Popen([sys.executable, __file__, '--serve-stub', '--stub-latency', str(latency)],
+                               stdout=subprocess.PIPE, text=True)
+    base_url = process.stdout.readline().strip()
+    if not base_url:
+        process.wait()
+        raise RuntimeError(f"Stub server exited with status {process.returncode}")
+    return base_url, process
+
+
+REQUESTS = {
+    'cnr': ('/api/search', {'method': 'cnr', 'cnr': 'DLCT01-123456-2024'}),
+    'details': ('/api/search', {'method': 'details', 'case_type': 'CC', 'case_number': '123', 'year': '2024'}),
+    'causelist': ('/api/causelist', {})
+}
+
+
+def parse_mix(spec):
+    """Parse 'cnr=6,details=2,causelist=2' into weighted choices"""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in REQUESTS:
+            raise ValueError(f"Unknown request type in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def send(base_url, name, timeout=30, scheduled=None):
+    """Send one request; returns (name, seconds, ok).
+
+    With scheduled (a time.monotonic() value), latency is measured from when
+    the request was due rather than when it was actually sent, so time spent
+    waiting for a free client thread counts (no coordinated omission).
+    """
+    path, body = REQUESTS[name]
+    req = urllib.request.Request(base_url + path, data=json.dumps(body).encode('utf-8'),
+                                 headers={'Content-Type': 'application/json'}, method='POST')
+    start = time.monotonic() if scheduled is None else scheduled
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            payload = json.loads(response.read())
+            ok = response.status == 200 and 'error' not in payload
+    except (urllib.error.URLError, OSError, ValueError):
+        ok = False
+    return name, time.monotonic() - start, ok
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(results, elapsed):
+    """Latency percentiles (ms), error rate and throughput for a run"""
+    latencies = [seconds for _, seconds, _ in results]
+    errors = sum(1 for _, _, ok in results if not ok)
+    summary = {
+        'requests': len(results),
+        'errors': errors,
+        'error_rate': errors / len(results) if results else 0.0,
+        'rps': len(results) / elapsed if elapsed else 0.0,
+        'by_type': {}
+    }
+    for pct in (50, 95, 99):
+        value = percentile(latencies, pct)
+        summary[f'p{pct}_ms'] = round(value * 1000, 1) if value is not None else None
+    for name in sorted({n for n, _, _ in results}):
+        own = [s for n, s, _ in results if n == name]
+        summary['by_type'][name] = {
+            'requests': len(own),
+            'p95_ms': round(percentile(own, 95) * 1000, 1)
+        }
+    return summary
+
+
+def run_load(base_url, mix, duration=10.0, concurrency=None, rps=None, timeout=30):
+    """Drive load for duration seconds.
+
+    With rps, requests are started on a fixed schedule (open loop) so a slow
+    server builds a backlog; concurrency, if given, caps the requests in
+    flight, and latency is still timed from each request's scheduled start.
+    Otherwise `concurrency` workers send back to back.
+    """
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    results = []
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + duration
+
+    def record(result):
+        with lock:
+            results.append(result)
+
+    if rps:
+        # Enough threads for every request that can be outstanding within the timeout
+        workers = concurrency or max(1, int(rps * timeout) + 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            sent = 0
+            while True:
+                due = start + sent / rps
+                if due >= deadline:
+                    break
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                name = random.choices(names, weights)[0]
+                pool.submit(lambda n=name, d=due: record(send(base_url, n, timeout, scheduled=d)))
+                sent += 1
+    else:
+        def worker():
+            while time.monotonic() < deadline:
+                record(send(base_url, random.choices(names, weights)[0], timeout))
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency or 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return summarize(results, time.monotonic() - start)
+
+
+def find_saturation(base_url, mix, max_concurrency=256, step_duration=5.0, p95_slo_ms=1000, max_error_rate=0.01):
+    """Double concurrency until p95 or errors exceed the SLO, or throughput stops growing"""
+    steps = []
+    concurrency = 1
+    best_rps = 0.0
+    while concurrency <= max_concurrency:
+        summary = run_load(base_url, mix, step_duration, concurrency=concurrency)
+        summary['concurrency'] = concurrency
+        steps.append(summary)
+        print_summary(summary, prefix=f"c={concurrency:<4} ")
+        breached = (summary['p95_ms'] is None or summary['p95_ms'] > p95_slo_ms
+                    or summary['error_rate'] > max_error_rate)
+        # Under 5% more throughput from doubling the users means the instance is saturated
+        flat = summary['rps'] < best_rps * 1.05
+        if breached or flat:
+            return {'saturation_concurrency': concurrency, 'last_good': steps[-2] if len(steps) > 1 else None, 'steps': steps}
+        best_rps = summary['rps']
+        concurrency *= 2
+    return {'saturation_concurrency': None, 'last_good': steps[-1] if steps else None, 'steps': steps}
+
+
+def print_summary(summary, prefix=''):
+    print(f"{prefix}requests={summary['requests']} rps={summary['rps']:.1f} "
+          f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms "
+          f"errors={summary['error_rate']:.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the eCourts web API')
+    parser.add_argument('--url', help='Target base URL (default: start the app locally with a stubbed scraper)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Request mix (default: {DEFAULT_MIX})')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--concurrency', type=int,
+                        help='Concurrent users (closed loop, default 8); with --rps, a cap on requests in flight')
+    parser.add_argument('--rps', type=float, help='Target requests per second (open loop)')
+    parser.add_argument('--ramp', action='store_true', help='Double concurrency until saturation')
+    parser.add_argument('--p95-slo', type=float, default=1000, help='p95 latency SLO in ms for --ramp')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='Mean simulated upstream latency in seconds')
+    parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    parser.add_argument('--serve-stub', action='store_true', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        serve_stub(args.stub_latency)
+        return
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        base_url, server = start_stub_server(args.stub_latency)
+        print(f"Started stubbed app at {base_url}")
+
+    try:
+        if args.ramp:
+            report = find_saturation(base_url, mix, step_duration=args.duration, p95_slo_ms=args.p95_slo)
+            print(f"\nSaturation at concurrency: {report['saturation_concurrency'] or 'not reached'}")
+        else:
+            concurrency = args.concurrency if args.rps else args.concurrency or 8
+            report = run_load(base_url, mix, args.duration, concurrency=concurrency, rps=args.rps)
+            print_summary(report)
+        if args.json:
+            print(json.dumps(report, indent=2))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+PDF Archive - Content-addressed, compressed, deduplicated store for case PDFs
+"""
+
+import argparse
+import errno
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from cnr_utils import normalize_cnr
+
+try:
+    import fcntl
+except ImportError:  # Windows: reflink export falls back to copy
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:  # optional, zlib is used when zstandard is missing
+    zstandard = None
+
+# ioctl request to clone a file's extents (btrfs, XFS with reflink=1)
+FICLONE = 0x40049409
+
+
+def _file_sha256(path):
+    """SHA-256 of a file's contents, or None if it cannot be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _compress(data):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(data)
+    return 'zlib', zlib.compress(data, 6)
+
+
+def _decompress(codec, data):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("Blob is zstd-compressed; pip install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    return data
+
+
+class PdfArchive:
+    """Store each distinct PDF once, keyed by SHA-256.
+
+    Layout under root:
+      blobs/ab/abcdef....<codec>   compressed PDF bytes
+      manifest.sqlite              (cnr, document, date) -> sha256
+    """
+
+    def __init__(self, root='pdf_archive'):
+        self.root = Path(root)
+        (self.root / 'blobs').mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / 'manifest.sqlite'), check_same_thread=False)
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS blobs ('
+            'sha256 TEXT PRIMARY KEY, codec TEXT, size INTEGER, stored_size INTEGER, created TEXT);'
+            'CREATE TABLE IF NOT EXISTS documents ('
+            'cnr TEXT, document TEXT, date TEXT, sha256 TEXT REFERENCES blobs(sha256), '
+            'PRIMARY KEY (cnr, document, date));'
+            'CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);'
+        )
+        self._conn.commit()
+
+    def _blob_path(self, sha256, codec):
+        return self.root / 'blobs' / sha256[:2] / f"{sha256}.{codec}"
+
+    def put(self, data, cnr, document='order', date=None):
+        """Archive PDF bytes for (cnr, document, date); identical bytes are stored once.
+
+        The manifest is keyed on the canonical CNR; anything else raises ValueError.
+        """
+        canonical = normalize_cnr(cnr)
+        if canonical is None:
+            raise ValueError(f"Not a valid CNR: {cnr}")
+        cnr = canonical
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            row = self._conn.execute('SELECT codec FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+            new_blob = row is None
+            if new_blob:
+                codec, stored = _compress(data)
+                path = self._blob_path(sha256, codec)
+                path.parent.mkdir(exist_ok=True)
+                tmp = path.with_suffix('.tmp')
+                with open(tmp, 'wb') as f:
+                    f.write(stored)
+                os.replace(tmp, path)
+                self._conn.execute(
+                    'INSERT INTO blobs (sha256, codec, size, stored_size, created) VALUES (?, ?, ?, ?, ?)',
+                    (sha256, codec, len(data), len(stored), datetime.now().isoformat())
+                )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO documents (cnr, document, date, sha256) VALUES (?, ?, ?, ?)',
+                (cnr, document, date, sha256)
+            )
+            self._conn.commit()
+
+        return {'sha256': sha256, 'new_blob': new_blob}
+
+    def get(self, sha256):
+        """Return the PDF bytes for a blob"""
+        with self._lock:
+            row = self._conn.execute('SELECT codec FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+        if row is None:
+            raise KeyError(sha256)
+        with open(self._blob_path(sha256, row[0]), 'rb') as f:
+            return _decompress(row[0], f.read())
+
+    def lookup(self, cnr, document=None, date=None):
+        """Manifest entries for a case, newest first"""
+        query = 'SELECT cnr, document, date, sha256 FROM documents WHERE cnr = ?'
+        params = [normalize_cnr(cnr) or cnr]
+        if document:
+            query += ' AND document = ?'
+            params.append(document)
+        if date:
+            query += ' AND date = ?'
+            params.append(date)
+        query += ' ORDER BY date DESC'
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(zip(('cnr', 'document', 'date', 'sha256'), row)) for row in rows]
+
+    def list(self, since=None, limit=None):
+        """Manifest entries (optionally since a date) without touching the blob directory"""
+        query = 'SELECT cnr, document, date, sha256 FROM documents'
+        params = []
+        if since:
+            query += ' WHERE date >= ?'
+            params.append(since)
+        query += ' ORDER BY date DESC, cnr'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(zip(('cnr', 'document', 'date', 'sha256'), row)) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            documents = self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+            blobs, size, stored = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs'
+            ).fetchone()
+        return {'documents': documents, 'blobs': blobs, 'bytes': size, 'stored_bytes': stored}
+
+    def export(self, sha256, dest, mode='copy', source=None):
+        """Write a PDF to dest, decompressed.
+
+        copy (the default) writes the bytes straight to dest. hardlink and
+        reflink instead share storage with source, an earlier export of the
+        same PDF, once its content hash is verified; without a verified
+        source, or when the filesystem cannot link (e.g. dest on another
+        device), they fall back to a copy. Nothing is cached in the archive.
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        if mode in ('hardlink', 'reflink') and source and _file_sha256(source) == sha256:
+            if Path(source).resolve() == dest.resolve():
+                return 'existing'
+            if dest.exists():
+                dest.unlink()
+            if mode == 'hardlink':
+                try:
+                    os.link(source, dest)
+                    return 'hardlink'
+                except OSError:
+                    pass
+            elif fcntl is not None:
+                try:
+                    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+                        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                    return 'reflink'
+                except OSError as e:
+                    if e.errno not in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY):
+                        raise
+                    dest.unlink(missing_ok=True)
+
+        tmp = dest.with_name(dest.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(self.get(sha256))
+        os.replace(tmp, dest)
+        return 'copy'
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='eCourts PDF Archive')
+    parser.add_argument('--archive', default='pdf_archive', help='Archive directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add = subparsers.add_parser('add', help='Archive PDF files')
+    add.add_argument('cnr')
+    add.add_argument('files', nargs='+')
+    add.add_argument('--document', default='order')
+    add.add_argument('--date')
+
+    ls = subparsers.add_parser('list', help='List archived documents')
+    ls.add_argument('--cnr')
+    ls.add_argument('--since')
+
+    export = subparsers.add_parser('export', help='Export a case\'s latest document')
+    export.add_argument('cnr')
+    export.add_argument('dest')
+    export.add_argument('--document')
+    export.add_argument('--mode', choices=['hardlink', 'reflink', 'copy'], default='copy')
+    export.add_argument('--source', help='Earlier export of the same PDF to hardlink/reflink to')
+
+    subparsers.add_parser('stats', help='Show archive size and dedup ratio')
+
+    args = parser.parse_args()
+    archive = PdfArchive(args.archive)
+
+    if args.command == 'add':
+        if normalize_cnr(args.cnr) is None:
+            print(f"Error: not a valid CNR: {args.cnr}")
+            return
+        for path in args.files:
+            with open(path, 'rb') as f:
+                result = archive.put(f.read(), args.cnr, args.document, args.date)
+            print(f"{path}: {result['sha256']} ({'stored' if result['new_blob'] else 'duplicate'})")
+    elif args.command == 'list':
+        entries = archive.lookup(args.cnr) if args.cnr else archive.list(args.since)
+        for entry in entries:
+            print(f"{entry['date']}  {entry['cnr']}  {entry['document']}  {entry['sha256'][:16]}")
+    elif args.command == 'export':
+        entries = archive.lookup(args.cnr, args.document)
+        if not entries:
+            print(f"Error: no documents archived for {args.cnr}")
+            return
+        used = archive.export(entries[0]['sha256'], args.dest, args.mode, args.source)
+        print(f"Exported to {args.dest} ({used})")
+    else:
+        stats = archive.stats()
+        print(f"Documents: {stats['documents']}")
+        print(f"Unique blobs: {stats['blobs']}")
+        print(f"Original bytes: {stats['bytes']}")
+        print(f"Stored bytes: {stats['stored_bytes']}")
+
+if __name__ == "__main__":
+    main()
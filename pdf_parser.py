@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+PDF Parser - Extract cause-list rows from PDF cause lists, pages in parallel
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional, only needed for PDF cause lists
+    PdfReader = None
+
+# "Court Room No. 3", "COURT NO 12", "Courtroom 4 - Shri X, ACJM"
+COURT_HEADER = re.compile(r'^\s*(court\s*(?:room)?\s*(?:no\.?)?\s*\d+.*|courtroom\s*\d+.*)$', re.IGNORECASE)
+# "15  CC/135/2024  State vs Abhinav Sharma", "15. CS 12/2023 Ram v. Shyam",
+# "3  Crl.A. 45/2022 ...", "6  CS DJ 123/2023 ...", "7  Bail Appln. 5/2024 ..."
+CASE_ROW = re.compile(
+    r'^\s*(?P<serial>\d{1,4})[.)]?\s+'
+    r'(?P<case_type>[A-Za-z][A-Za-z.()\-]{0,15}(?: [A-Za-z.()\-]{1,15}){0,3})\s*[/ ]\s*'
+    r'(?P<number>\d{1,7})\s*/\s*(?P<year>\d{4})\s+'
+    r'(?P<parties>.+?)\s*$'
+)
+# Any line that opens with a serial number is meant to be a case row
+SERIAL_LINE = re.compile(r'^\s*\d{1,4}[.)]?\s+\S')
+
+
+def _require_pypdf():
+    if PdfReader is None:
+        raise ImportError("PDF parsing requires pypdf: pip install pypdf")
+
+
+def parse_page_text(text):
+    """Parse one page of cause-list text.
+
+    Returns (rows, last_court, unparsed). Rows before the first court header
+    on the page have court_name None; the caller fills them from the previous
+    page. unparsed holds lines that start with a serial number but could not
+    be read as a case row.
+    """
+    rows = []
+    unparsed = []
+    court = None
+    for line in text.splitlines():
+        header = COURT_HEADER.match(line)
+        if header:
+            court = ' '.join(header.group(1).split())
+            continue
+        match = CASE_ROW.match(line)
+        if match:
+            case_type = ' '.join(match.group('case_type').split())
+            rows.append({
+                'serial_no': match.group('serial'),
+                'case_no': f"{case_type}/{match.group('number')}/{match.group('year')}",
+                'parties': ' '.join(match.group('parties').split()),
+                'court_name': court
+            })
+        elif SERIAL_LINE.match(line):
+            unparsed.append(line.strip())
+    return rows, court, unparsed
+
+
+def merge_pages(pages, unparsed=None):
+    """Yield rows from parse_page_text results in page order, carrying court headers across pages"""
+    court = None
+    for rows, last_court, page_unparsed in pages:
+        for row in rows:
+            if row['court_name'] is None:
+                row['court_name'] = court
+            yield row
+        if last_court:
+            court = last_court
+        if unparsed is not None:
+            unparsed.extend(page_unparsed)
+
+
+def _parse_pages(path, start, stop):
+    """Worker: extract and parse pages [start, stop) of a PDF"""
+    reader = PdfReader(path)
+    return [parse_page_text(reader.pages[i].extract_text() or '') for i in range(start, stop)]
+
+
+def page_count(path):
+    _require_pypdf()
+    return len(PdfReader(path).pages)
+
+
+def iter_cause_list_rows(path, workers=None, chunk_pages=10, unparsed=None):
+    """Yield rows from a PDF cause list in page order, parsing chunks of pages on a process pool.
+
+    Lines that look like case rows but could not be parsed are appended to unparsed, if given.
+    """
+    _require_pypdf()
+    total = page_count(path)
+    chunks = [(start, min(start + chunk_pages, total)) for start in range(0, total, chunk_pages)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(chunks) <= 1:
+        pages = (page for start, stop in chunks for page in _parse_pages(path, start, stop))
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+        # map() keeps chunk order, so rows stream out as soon as earlier pages are ready
+        results = executor.map(_parse_pages, [path] * len(chunks), *zip(*chunks))
+        pages = (page for chunk in results for page in chunk)
+
+    try:
+        yield from merge_pages(pages, unparsed)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def parse_cause_list_pdf(path, date=None, court=None, workers=None, chunk_pages=10, unparsed=None):
+    """Parse a PDF cause list into the download_cause_list dict shape"""
+    cases = []
+    for row in iter_cause_list_rows(path, workers, chunk_pages, unparsed):
+        if row['court_name'] is None:
+            del row['court_name']
+        cases.append(row)
+    return {'date': date, 'court': court, 'cases': cases}
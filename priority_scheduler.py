@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Priority Scheduler - Weighted fair queuing of upstream requests over one rate budget
+"""
+
+import getpass
+import heapq
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+INTERACTIVE = 'interactive'
+WATCHLIST = 'watchlist'
+BACKFILL = 'backfill'
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 16, WATCHLIST: 4, BACKFILL: 1}
+# Tokens and connection slots each class must leave free for higher classes,
+# so interactive lookups find headroom even while other processes crawl
+DEFAULT_RESERVE = {INTERACTIVE: 0, WATCHLIST: 1, BACKFILL: 2}
+
+# How often to re-check a budget shared with other processes while blocked on slots
+POLL_INTERVAL = 0.05
+
+_context = threading.local()
+
+
+@contextmanager
+def request_priority(priority):
+    """Tag upstream requests made by this thread inside the block with a priority class"""
+    previous = getattr(_context, 'priority', None)
+    _context.priority = priority
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+def current_priority(default=INTERACTIVE):
+    return getattr(_context, 'priority', None) or default
+
+
+def _admit(tokens, in_flight, reserve, burst, max_concurrent, rate):
+    """Return (granted, seconds to wait for tokens) for one request holding back reserve.
+
+    The reserve is capped so every class can still run on a small budget.
+    """
+    token_reserve = min(reserve, max(0.0, burst - 1))
+    slot_reserve = min(reserve, max(0, max_concurrent - 1))
+    if rate is not None and tokens < 1 + token_reserve:
+        return False, (1 + token_reserve - tokens) / rate
+    return in_flight < max_concurrent - slot_reserve, None
+
+
+class LocalBudget:
+    """Token bucket and connection slots for this process only"""
+
+    def __init__(self, rate=10.0, burst=None, max_concurrent=8, reserve=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate or 1.0)
+        self.max_concurrent = max_concurrent
+        self.reserve = dict(DEFAULT_RESERVE if reserve is None else reserve)
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._slots = set()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, priority):
+        """Take a token and a slot for priority: (slot id, None), or (None, seconds to wait)"""
+        reserve = self.reserve.get(priority, 0)
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is None:
+                self._tokens = self.burst
+            else:
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+
+            granted, wait = _admit(self._tokens, len(self._slots), reserve,
+                                   self.burst, self.max_concurrent, self.rate)
+            if not granted:
+                return None, wait
+            slot = uuid.uuid4().hex
+            self._slots.add(slot)
+            self._tokens -= 1
+            return slot, None
+
+    def release(self, slot):
+        with self._lock:
+            self._slots.discard(slot)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._slots)
+
+
+class SqliteBudget:
+    """Token bucket and connection slots in a SQLite file shared by every process using it.
+
+    The web server, GUI, CLI runs and coordinator workers on one machine
+    draw from the same upstream rate and connection limit. Slots are leases:
+    a process that dies while holding one frees it after `slot_lease` seconds.
+    """
+
+    def __init__(self, path, rate=10.0, burst=None, max_concurrent=8, reserve=None, slot_lease=120.0):
+        self.path = str(path)
+        self.rate = rate
+        self.burst = burst or max(1.0, rate or 1.0)
+        self.max_concurrent = max_concurrent
+        self.reserve = dict(DEFAULT_RESERVE if reserve is None else reserve)
+        self.slot_lease = slot_lease
+        self._local = threading.local()
+        # WAL lets processes read while another holds the write lock
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+        with self._transaction() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS bucket ('
+                         'id INTEGER PRIMARY KEY CHECK (id = 1), tokens REAL, refilled REAL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS slots (id TEXT PRIMARY KEY, priority TEXT, expires REAL)')
+            conn.execute('INSERT OR IGNORE INTO bucket (id, tokens, refilled) VALUES (1, ?, ?)',
+                         (self.burst, time.time()))
+
+    @contextmanager
+    def _transaction(self):
+        # One connection per thread, each transaction BEGIN IMMEDIATE so the
+        # read-modify-write of the bucket is atomic across processes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def try_acquire(self, priority):
+        """Take a token and a slot for priority: (slot id, None), or (None, seconds to wait)"""
+        reserve = self.reserve.get(priority, 0)
+        now = time.time()
+        with self._transaction() as conn:
+            tokens, refilled = conn.execute('SELECT tokens, refilled FROM bucket WHERE id = 1').fetchone()
+            if self.rate is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, tokens + max(0.0, now - refilled) * self.rate)
+            conn.execute('DELETE FROM slots WHERE expires < ?', (now,))
+            in_flight = conn.execute('SELECT COUNT(*) FROM slots').fetchone()[0]
+
+            slot = None
+            granted, wait = _admit(tokens, in_flight, reserve, self.burst, self.max_concurrent, self.rate)
+            if granted:
+                slot = uuid.uuid4().hex
+                conn.execute('INSERT INTO slots (id, priority, expires) VALUES (?, ?, ?)',
+                             (slot, priority, now + self.slot_lease))
+                tokens -= 1
+            conn.execute('UPDATE bucket SET tokens = ?, refilled = ? WHERE id = 1', (tokens, now))
+        return slot, wait
+
+    def release(self, slot):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM slots WHERE id = ?', (slot,))
+
+    def in_flight(self):
+        with self._transaction() as conn:
+            return conn.execute('SELECT COUNT(*) FROM slots WHERE expires >= ?', (time.time(),)).fetchone()[0]
+
+
+class RequestScheduler:
+    """Grant upstream requests slots under a shared rate and connection limit.
+
+    Waiting requests in this process are ordered by weighted fair queuing:
+    each request gets a virtual finish tag of max(virtual time, its class's
+    last tag) + 1/weight, and the lowest tag goes next. An interactive lookup
+    arriving behind thousands of queued backfill requests therefore lands
+    near the front, while backfill still progresses at its share of the
+    budget. The budget itself (LocalBudget, or SqliteBudget to share it
+    between processes) keeps a per-class reserve free for higher classes.
+    """
+
+    def __init__(self, rate=10.0, burst=None, max_concurrent=8, weights=None, budget=None):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.budget = budget or LocalBudget(rate, burst, max_concurrent)
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._virtual = 0.0
+        self._last_tag = {}
+        self._stats = {name: {'waiting': 0, 'granted': 0, 'wait_seconds': 0.0} for name in self.weights}
+
+    def _class(self, priority):
+        priority = priority if priority in self.weights else current_priority()
+        return priority if priority in self.weights else INTERACTIVE
+
+    def _tag(self, priority):
+        tag = max(self._virtual, self._last_tag.get(priority, 0.0)) + 1.0 / self.weights[priority]
+        self._last_tag[priority] = tag
+        return tag
+
+    def acquire(self, priority=None):
+        """Block until a request of this priority class may be sent; returns the slot to release"""
+        priority = self._class(priority)
+        started = time.monotonic()
+
+        with self._cond:
+            tag = self._tag(priority)
+            ticket = (tag, next(self._seq), priority)
+            heapq.heappush(self._heap, ticket)
+            self._stats[priority]['waiting'] += 1
+
+            try:
+                while True:
+                    if self._heap[0] is ticket:
+                        slot, wait = self.budget.try_acquire(priority)
+                        if slot is not None:
+                            break
+                    else:
+                        wait = None
+                    # Slots freed by other processes are not signalled here, so poll
+                    self._cond.wait(min(wait or POLL_INTERVAL, 1.0))
+            except BaseException:
+                self._heap.remove(ticket)
+                heapq.heapify(self._heap)
+                self._stats[priority]['waiting'] -= 1
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._heap)
+            self._virtual = tag
+            stats = self._stats[priority]
+            stats['waiting'] -= 1
+            stats['granted'] += 1
+            stats['wait_seconds'] += time.monotonic() - started
+            # The next ticket in line may be able to go right away
+            self._cond.notify_all()
+        return slot
+
+    def try_acquire(self, priority=None):
+        """Take a slot only if one is free now and nothing is queued ahead; None otherwise.
+
+        For optional requests such as hedges, which should not wait in line.
+        """
+        priority = self._class(priority)
+        with self._cond:
+            if self._heap:
+                return None
+            slot, _ = self.budget.try_acquire(priority)
+            if slot is not None:
+                self._virtual = self._tag(priority)
+                self._stats[priority]['granted'] += 1
+            return slot
+
+    def release(self, slot):
+        self.budget.release(slot)
+        with self._cond:
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority=None):
+        slot = self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(slot)
+
+    def stats(self):
+        """Per-class queue depth, grants and average wait"""
+        with self._cond:
+            return {
+                name: {
+                    'waiting': s['waiting'],
+                    'granted': s['granted'],
+                    'avg_wait_ms': round(s['wait_seconds'] / s['granted'] * 1000, 1) if s['granted'] else 0.0
+                }
+                for name, s in self._stats.items()
+            }
+
+
+def default_budget_path():
+    """Shared budget file: $ECOURTS_BUDGET, or one per user in the temp directory"""
+    if os.environ.get('ECOURTS_BUDGET'):
+        return os.environ['ECOURTS_BUDGET']
+    try:
+        user = getpass.getuser()
+    except (KeyError, OSError, ImportError):
+        # No login name (e.g. a container uid without a passwd entry)
+        user = str(os.getuid()) if hasattr(os, 'getuid') else 'default'
+    return os.path.join(tempfile.gettempdir(), f"ecourts_budget_{user}.sqlite")
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler():
+    """Scheduler used by every scraper in the process, drawing on the machine-wide budget.
+
+    Set ECOURTS_BUDGET=local to keep the budget within this process.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            budget = None
+            try:
+                path = default_budget_path()
+                if path != 'local':
+                    budget = SqliteBudget(path)
+            except (sqlite3.Error, OSError):
+                budget = None  # unwritable location: fall back to a per-process budget
+            _shared = RequestScheduler(budget=budget)
+        return _shared
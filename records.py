@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Compact record types for case results and bulk cause-list data
+"""
+
+import sys
+from array import array
+
+# Serial numbers are stored as unsigned ints; non-numeric ones go to a side table
+_NO_SERIAL = 0
+
+
+def _extra_fields(row):
+    extra = {k: v for k, v in row.items() if k not in CauseListRow.FIELDS}
+    return extra or None
+
+
+class CaseRecord:
+    """Case search result with the same fields as the case_details dict"""
+    __slots__ = ('case_type', 'case_number', 'year', 'parties', 'court', 'cnr', 'listing_info', 'extra')
+
+    _RESULT_FIELDS = ('case_found', 'case_details', 'cnr', 'listing_info')
+    _DETAIL_FIELDS = ('case_type', 'case_number', 'year', 'parties', 'court')
+
+    def __init__(self, case_type, case_number, year, parties=None, court=None, cnr=None, listing_info=None,
+                 extra=None):
+        self.case_type = sys.intern(case_type)
+        self.case_number = case_number
+        self.year = year
+        self.parties = parties
+        self.court = sys.intern(court) if court else court
+        self.cnr = cnr
+        self.listing_info = listing_info
+        # Fields beyond the fixed ones: {'result': {...}, 'details': {...}}, or None
+        self.extra = extra
+
+    @property
+    def case_no(self):
+        return f"{self.case_type}/{self.case_number}/{self.year}"
+
+    @classmethod
+    def from_dict(cls, result):
+        """Build from a search_case_by_* result dict"""
+        details = result['case_details']
+        extra = {
+            'result': {k: v for k, v in result.items() if k not in cls._RESULT_FIELDS},
+            'details': {k: v for k, v in details.items() if k not in cls._DETAIL_FIELDS}
+        }
+        return cls(details['case_type'], details['case_number'], details['year'],
+                   details.get('parties'), details.get('court'),
+                   result.get('cnr'), result.get('listing_info'),
+                   extra if extra['result'] or extra['details'] else None)
+
+    def to_dict(self):
+        """Return the search_case_by_* result dict shape"""
+        result = {
+            'case_found': True,
+            'case_details': {
+                'case_type': self.case_type,
+                'case_number': self.case_number,
+                'year': self.year,
+                'parties': self.parties,
+                'court': self.court
+            },
+            'listing_info': self.listing_info
+        }
+        if self.cnr:
+            result['cnr'] = self.cnr
+        if self.extra:
+            result['case_details'].update(self.extra['details'])
+            result.update(self.extra['result'])
+        return result
+
+
+class CauseListRow:
+    """One cause-list entry with the same fields as the cases[] dicts"""
+    __slots__ = ('serial_no', 'case_no', 'parties', 'court_name', 'extra')
+
+    FIELDS = ('serial_no', 'case_no', 'parties', 'court_name')
+
+    def __init__(self, serial_no, case_no, parties, court_name=None, extra=None):
+        self.serial_no = serial_no
+        self.case_no = case_no
+        self.parties = sys.intern(parties) if parties else parties
+        self.court_name = sys.intern(court_name) if court_name else court_name
+        # Any other fields of the row (e.g. cnr), or None
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(row.get('serial_no'), row['case_no'], row.get('parties'), row.get('court_name'),
+                   _extra_fields(row))
+
+    def to_dict(self):
+        row = {'serial_no': self.serial_no, 'case_no': self.case_no, 'parties': self.parties}
+        if self.court_name:
+            row['court_name'] = self.court_name
+        if self.extra:
+            row.update(self.extra)
+        return row
+
+
+class CauseListColumns:
+    """Column-oriented store for many cause lists (e.g. a week of lists for a state).
+
+    Each column is a flat list or array with one slot per row. Dates and courts
+    are stored as small ints into lookup tables, serial numbers as an unsigned
+    int array, and repeated strings (parties, court rooms) are interned.
+    Fields beyond those (e.g. cnr) are kept per row in a sparse side column.
+    """
+
+    def __init__(self):
+        self._dates = []
+        self._courts = []
+        self._date_ids = {}
+        self._court_ids = {}
+
+        self.date_id = array('I')
+        self.court_id = array('I')
+        self.serial = array('I')
+        self.case_no = []
+        self.parties = []
+        self.court_name = []
+
+        # row -> original serial_no when it is not a plain integer
+        self._odd_serials = {}
+        # row -> fields outside the fixed columns
+        self._extra = {}
+        # (date, court) -> (start, stop) row range
+        self._lists = {}
+        # case_no -> rows listing it, and rows of replaced lists awaiting compaction
+        self._case_rows = {}
+        self._dead = 0
+
+    def __len__(self):
+        return len(self.case_no)
+
+    def _intern_id(self, value, table, ids):
+        value = sys.intern(value or '')
+        if value not in ids:
+            ids[value] = len(table)
+            table.append(value)
+        return ids[value]
+
+    def has(self, date, court):
+        return (date, court) in self._lists
+
+    def add_cause_list(self, cause_list, replace=False):
+        """Append a cause list in the download_cause_list dict shape.
+
+        With replace, an already stored list for the same (date, court) is
+        dropped first; its rows are reclaimed once they outnumber live rows.
+        """
+        key = (cause_list.get('date'), cause_list.get('court'))
+        if key in self._lists:
+            if not replace:
+                raise ValueError(f"Cause list already stored for {key[1]} on {key[0]}")
+            self._drop(key)
+
+        date_id = self._intern_id(key[0], self._dates, self._date_ids)
+        court_id = self._intern_id(key[1], self._courts, self._court_ids)
+        start = len(self)
+
+        for row in cause_list.get('cases', []):
+            serial = str(row.get('serial_no') or '')
+            if serial.isdigit() and int(serial) > 0 and str(int(serial)) == serial:
+                self.serial.append(int(serial))
+            else:
+                self._odd_serials[len(self)] = row.get('serial_no')
+                self.serial.append(_NO_SERIAL)
+            self.date_id.append(date_id)
+            self.court_id.append(court_id)
+            self.case_no.append(row['case_no'])
+            self.parties.append(sys.intern(row['parties']) if row.get('parties') else row.get('parties'))
+            court_name = row.get('court_name')
+            self.court_name.append(sys.intern(court_name) if court_name else None)
+            extra = _extra_fields(row)
+            if extra:
+                self._extra[len(self) - 1] = extra
+            self._case_rows.setdefault(row['case_no'], []).append(len(self) - 1)
+
+        self._lists[key] = (start, len(self))
+
+    def _drop(self, key):
+        start, stop = self._lists.pop(key)
+        for i in range(start, stop):
+            rows = self._case_rows[self.case_no[i]]
+            rows.remove(i)
+            if not rows:
+                del self._case_rows[self.case_no[i]]
+        self._dead += stop - start
+        if self._dead > len(self) - self._dead:
+            self._compact()
+
+    def _compact(self):
+        compacted = CauseListColumns.from_cause_lists(self.to_cause_lists())
+        for name in ('_dates', '_courts', '_date_ids', '_court_ids', 'date_id', 'court_id', 'serial',
+                     'case_no', 'parties', 'court_name', '_odd_serials', '_extra', '_lists',
+                     '_case_rows', '_dead'):
+            setattr(self, name, getattr(compacted, name))
+
+    def _serial_at(self, i):
+        if i in self._odd_serials:
+            return self._odd_serials[i]
+        return str(self.serial[i])
+
+    def row(self, i):
+        """Return row i as a CauseListRow"""
+        return CauseListRow(self._serial_at(i), self.case_no[i], self.parties[i], self.court_name[i],
+                            self._extra.get(i))
+
+    def keys(self):
+        """(date, court) pairs of stored cause lists"""
+        return list(self._lists)
+
+    def cause_list(self, date, court):
+        """Return one stored cause list in the download_cause_list dict shape"""
+        span = self._lists.get((date, court))
+        if span is None:
+            return None
+        return {
+            'date': date,
+            'court': court,
+            'cases': [self.row(i).to_dict() for i in range(*span)]
+        }
+
+    def find_case(self, case_no):
+        """Yield (date, court, CauseListRow) for every listing of case_no"""
+        for i in self._case_rows.get(case_no, ()):
+            yield self._dates[self.date_id[i]], self._courts[self.court_id[i]], self.row(i)
+
+    @classmethod
+    def from_cause_lists(cls, cause_lists):
+        store = cls()
+        for cause_list in cause_lists:
+            store.add_cause_list(cause_list)
+        return store
+
+    def to_cause_lists(self):
+        """Return every stored cause list as dicts"""
+        return [self.cause_list(date, court) for date, court in self._lists]
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Hedged requests and circuit breakers for upstream calls
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the endpoint's circuit is open"""
+
+
+class LatencyTracker:
+    """Rolling window of request latencies (seconds)"""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """Latency at pct (0-100), or None until min_samples have been seen"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    closed    - calls go through; `failure_threshold` consecutive failures open it
+    open      - calls raise CircuitOpenError until `reset_timeout` has passed
+    half_open - one trial call; success closes the circuit, failure re-opens it
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_running = False
+            if self.state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def call(self, fn, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError('Upstream circuit open, failing fast')
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def endpoint_guards(url):
+    """Process-wide (CircuitBreaker, LatencyTracker) for an upstream URL.
+
+    Shared so that short-lived clients (e.g. one scraper per web request)
+    still build up failure counts and latency history.
+    """
+    with _endpoints_lock:
+        if url not in _endpoints:
+            _endpoints[url] = (CircuitBreaker(), LatencyTracker())
+        return _endpoints[url]
+
+
+_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+
+
+def hedged_call(fn, tracker, percentile=95, max_attempts=2, executor=None, admit=None):
+    """Call fn(), sending a duplicate if it runs past the tracker's percentile latency.
+
+    Returns the first successful result; raises the last error if every attempt fails.
+    Latencies of successful attempts are fed back into the tracker.
+
+    admit(hedge), if given, is called in the calling thread before each attempt
+    starts and returns a release callback, or None to skip an optional hedge.
+    It may block (e.g. on a rate budget) for the first attempt and for retries
+    of failed ones; attempt clocks and the hedge delay start once it returns,
+    so time spent waiting for admission is not counted as upstream latency.
+    """
+    executor = executor or _hedge_pool
+
+    def timed(release):
+        try:
+            start = time.monotonic()
+            result = fn()
+            tracker.record(time.monotonic() - start)
+            return result
+        finally:
+            release()
+
+    def submit(hedge):
+        release = admit(hedge) if admit else (lambda: None)
+        if release is None:
+            return None
+        try:
+            return executor.submit(timed, release)
+        except BaseException:
+            release()
+            raise
+
+    pending = {submit(False)}
+    attempts = 1
+    error = None
+
+    while pending:
+        delay = tracker.percentile(percentile) if attempts < max_attempts else None
+        done, pending = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+
+        # Hedge when the wait timed out, or replace an attempt that failed fast
+        if attempts < max_attempts and (not done or not pending):
+            future = submit(hedge=bool(pending))
+            attempts += 1
+            if future is not None:
+                pending.add(future)
+
+    raise error
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Output sinks for scraper results (JSON files, JSONL, gzip JSONL, stdout, SQLite)
+"""
+
+import gzip
+import json
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+
+def dumps(obj, compact=True):
+    """Encode obj as JSON bytes, using orjson when available"""
+    if compact and orjson is not None:
+        return orjson.dumps(obj)
+    if compact:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+
+class OutputSink(ABC):
+    """Base sink. Records are buffered and written in batches of batch_size."""
+
+    def __init__(self, batch_size=1, attachments_dir='.'):
+        self.batch_size = batch_size
+        self.attachments_dir = Path(attachments_dir)
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def write(self, record, name=None, kind='result'):
+        """Queue a JSON record and return where it will be stored"""
+        with self._lock:
+            self._buffer.append((kind, name, record))
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+        return self.location(name)
+
+    def write_bytes(self, data, name, kind='pdf'):
+        """Store a binary attachment (e.g. a PDF) and return its location"""
+        self.attachments_dir.mkdir(parents=True, exist_ok=True)
+        path = self.attachments_dir / name
+        with open(path, 'wb') as f:
+            f.write(data)
+        return str(path) if self.attachments_dir != Path('.') else name
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._write_batch(batch)
+
+    @abstractmethod
+    def _write_batch(self, batch):
+        """Store a list of (kind, name, record) tuples"""
+
+    @abstractmethod
+    def location(self, name):
+        """Where a record written under name is stored"""
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonFileSink(OutputSink):
+    """One pretty-printed JSON file per record (the original output format)"""
+
+    def __init__(self, directory='.', indent=2):
+        super().__init__(batch_size=1, attachments_dir=directory)
+        self.directory = Path(directory)
+        self.indent = indent
+
+    def location(self, name):
+        name = name or f"result_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+        return str(self.directory / name) if self.directory != Path('.') else name
+
+    def write(self, record, name=None, kind='result'):
+        # Resolve the default name once so the file written is the one returned
+        filename = self.location(name)
+        self._write_batch([(kind, filename, record)])
+        return filename
+
+    def _write_batch(self, batch):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for _, filename, record in batch:
+            with open(filename, 'w') as f:
+                json.dump(record, f, indent=self.indent)
+
+
+class JsonlSink(OutputSink):
+    """Append compact JSON lines ({"kind", "name", "data"}) to a single file"""
+
+    def __init__(self, path, batch_size=500, attachments_dir='.'):
+        super().__init__(batch_size=batch_size, attachments_dir=attachments_dir)
+        self.path = Path(path)
+        self._file = None
+
+    def _open(self):
+        return open(self.path, 'ab')
+
+    def _write_batch(self, batch):
+        if self._file is None:
+            self._file = self._open()
+        self._file.write(b''.join(
+            dumps({'kind': kind, 'name': name, 'data': record}) + b'\n'
+            for kind, name, record in batch
+        ))
+        self._file.flush()
+
+    def location(self, name):
+        return str(self.path)
+
+    def close(self):
+        super().close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class GzipJsonlSink(JsonlSink):
+    """JSONL sink compressed with gzip (each flush appends a gzip member)"""
+
+    def _open(self):
+        return gzip.open(self.path, 'ab', compresslevel=6)
+
+
+class StdoutSink(OutputSink):
+    """Write compact JSON lines to stdout for piping into other tools"""
+
+    def __init__(self, batch_size=100, attachments_dir='.'):
+        super().__init__(batch_size=batch_size, attachments_dir=attachments_dir)
+        # Bound now, so callers can redirect sys.stdout (e.g. status text to stderr)
+        self.stream = sys.stdout
+
+    def _write_batch(self, batch):
+        out = getattr(self.stream, 'buffer', None)
+        lines = b''.join(dumps({'kind': kind, 'name': name, 'data': record}) + b'\n'
+                         for kind, name, record in batch)
+        if out is None:
+            self.stream.write(lines.decode('utf-8'))
+        else:
+            self.stream.flush()
+            out.write(lines)
+        self.stream.flush()
+
+    def location(self, name):
+        return '<stdout>'
+
+
+class SqliteSink(OutputSink):
+    """Store records (and PDFs) in a SQLite database"""
+
+    def __init__(self, path, batch_size=500):
+        super().__init__(batch_size=batch_size)
+        self.path = str(path)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'id INTEGER PRIMARY KEY, kind TEXT, name TEXT, created TEXT, data TEXT)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS attachments ('
+            'id INTEGER PRIMARY KEY, kind TEXT, name TEXT, created TEXT, data BLOB)'
+        )
+        self._conn.commit()
+
+    def _write_batch(self, batch):
+        created = datetime.now().isoformat()
+        self._conn.executemany(
+            'INSERT INTO results (kind, name, created, data) VALUES (?, ?, ?, ?)',
+            [(kind, name, created, dumps(record).decode('utf-8')) for kind, name, record in batch]
+        )
+        self._conn.commit()
+
+    def write_bytes(self, data, name, kind='pdf'):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO attachments (kind, name, created, data) VALUES (?, ?, ?, ?)',
+                (kind, name, datetime.now().isoformat(), sqlite3.Binary(data))
+            )
+            self._conn.commit()
+        return f"{self.path}:{name}"
+
+    def location(self, name):
+        return f"{self.path}:{name}" if name else self.path
+
+    def close(self):
+        super().close()
+        self._conn.close()
+
+
+def open_sink(spec=None):
+    """Create a sink from a spec string.
+
+    None or 'json:DIR'  - one JSON file per result (default: current directory)
+    '-' or 'stdout'     - JSON lines on stdout
+    'sqlite:PATH'       - SQLite database
+    'PATH.jsonl'        - JSON lines file
+    'PATH.jsonl.gz'     - gzip-compressed JSON lines file
+    """
+    if not spec:
+        return JsonFileSink()
+    if spec in ('-', 'stdout'):
+        return StdoutSink()
+    if spec.startswith('json:'):
+        return JsonFileSink(spec[len('json:'):] or '.')
+    if spec.startswith('sqlite:'):
+        return SqliteSink(spec[len('sqlite:'):])
+    if spec.endswith('.jsonl.gz'):
+        return GzipJsonlSink(spec)
+    if spec.endswith('.jsonl'):
+        return JsonlSink(spec)
+    if spec.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SqliteSink(spec)
+    raise ValueError(f"Unknown output sink: {spec}")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Snapshots - Persist in-memory caches and indexes for warm restarts
+"""
+
+import os
+import pickle
+import threading
+import time
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotManager:
+    """Save registered in-memory state to one pickle file and restore it at startup.
+
+    Each source registers a dump() callable returning picklable state and a
+    restore(state) callable. Snapshots older than max_age seconds are ignored;
+    sources apply their own finer-grained freshness (TTLs, dates) on restore.
+    The snapshot is a local trusted file: pickle is used because it is the
+    fastest format to load, not for exchange.
+    """
+
+    def __init__(self, path, interval=300, max_age=12 * 3600):
+        self.path = str(path)
+        self.interval = interval
+        self.max_age = max_age
+        self._sources = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def register(self, name, dump, restore):
+        self._sources[name] = (dump, restore)
+
+    def save(self):
+        """Write a snapshot of every registered source atomically"""
+        state = {name: dump() for name, (dump, _) in self._sources.items()}
+        payload = {'version': SNAPSHOT_VERSION, 'created': time.time(), 'state': state}
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        return {'success': True, 'filename': self.path, 'sources': list(state)}
+
+    def restore(self):
+        """Load the snapshot into registered sources; returns names restored"""
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'rb') as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return []
+        if payload.get('version') != SNAPSHOT_VERSION or time.time() - payload.get('created', 0) > self.max_age:
+            return []
+
+        restored = []
+        for name, (_, restore) in self._sources.items():
+            if name in payload['state']:
+                restore(payload['state'][name])
+                restored.append(name)
+        return restored
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.save()
+            except OSError:
+                pass
+
+    def start(self):
+        """Save periodically in the background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop periodic saves and write a final snapshot"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        return self.save()
@@ -4,7 +4,34 @@ Test script for eCourts Scraper
 """
 
 from ecourts_scraper import ECourtsScraper
+from sinks import OutputSink, StdoutSink, open_sink
+from causelist_diff import CauseListStore, diff_cause_lists
+from causelist_archive import CauseListArchive, CauseListIndex, write_archive
+from case_cache import CaseCache
+from records import CaseRecord, CauseListColumns
+from coordinator import CrawlWorker, WorkQueue, cause_list_units
+from concurrency import AIMDLimiter
+from cnr_utils import establishment_route, normalize_cnr, prepare_cnrs
+from pdf_archive import PdfArchive
+from pdf_parser import merge_pages, parse_page_text
+from listing_scheduler import ListingScheduler, load_watchlist
+from snapshots import SnapshotManager
+from journal import CrawlJournal, run_journaled
+from transport import RecordingTransport, ReplayMissError, ReplayTransport, Transport, TransportResponse
+from resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged_call
+from priority_scheduler import BACKFILL, INTERACTIVE, LocalBudget, RequestScheduler, SqliteBudget
+import gzip
+import io
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
 import json
+import requests
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
 
 def test_scraper():
     print("Testing eCourts Scraper...")
@@ -33,5 +60,788 @@ def test_scraper():
     
     print("\nAll tests completed!")
 
+def test_cause_list_diff():
+    print("Testing cause list diff...")
+    
+    day1 = {'date': '2024-10-01', 'court': 'District Court', 'cases': [
+        {'serial_no': '1', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar'},
+        {'serial_no': '2', 'case_no': 'CC/124/2024', 'parties': 'State vs Pintu Singh'}
+    ]}
+    day2 = {'date': '2024-10-02', 'court': 'District Court', 'cases': [
+        {'serial_no': '1', 'case_no': 'CC/124/2024', 'parties': 'State vs Pintu Singh'},
+        {'serial_no': '2', 'case_no': 'CC/135/2024', 'parties': 'State vs Abhinav Sharma'}
+    ]}
+    
+    delta = diff_cause_lists(day1, day2)
+    print(f"Delta: {json.dumps(delta, indent=2)}")
+    assert [row['case_no'] for row in delta['added']] == ['CC/135/2024']
+    assert [row['case_no'] for row in delta['removed']] == ['CC/123/2024']
+    assert delta['resequenced'] == [{'case_no': 'CC/124/2024', 'old_serial_no': '2', 'new_serial_no': '1'}]
+    
+    with tempfile.TemporaryDirectory() as root:
+        store = CauseListStore(root)
+        store.save(day1)
+        assert store.save(day2)['delta'] is not None
+        assert store.load('District Court', '2024-10-02') == day2
+    
+    # Saving an earlier date after a later one must not corrupt the later day
+    lists = {date: {'date': date, 'court': 'C', 'cases': [
+        {'serial_no': '1', 'case_no': case_no, 'parties': 'State vs ' + case_no}
+    ]} for date, case_no in [('2024-10-01', 'A'), ('2024-10-02', 'X'), ('2024-10-03', 'B')]}
+    with tempfile.TemporaryDirectory() as root:
+        store = CauseListStore(root)
+        for date in ('2024-10-01', '2024-10-03', '2024-10-02'):
+            store.save(lists[date])
+        for date, cause_list in lists.items():
+            assert store.load('C', date) == cause_list
+        
+        # Re-saving a date rebuilds the days after it
+        lists['2024-10-02']['cases'][0]['parties'] = 'State vs Y'
+        store.save(lists['2024-10-02'])
+        for date, cause_list in lists.items():
+            assert store.load('C', date) == cause_list
+    
+    # A case listed in two court rooms of one district list keeps both rows
+    rooms = [
+        {'date': '2024-10-01', 'court': 'D', 'cases': [
+            {'serial_no': '1', 'case_no': 'CC/1/2024', 'parties': 'A vs B', 'court_name': 'Court Room 1'},
+            {'serial_no': '2', 'case_no': 'CC/2/2024', 'parties': 'C vs D', 'court_name': 'Court Room 1'}
+        ]},
+        {'date': '2024-10-02', 'court': 'D', 'cases': [
+            {'serial_no': '1', 'case_no': 'CC/2/2024', 'parties': 'C vs D', 'court_name': 'Court Room 1'},
+            {'serial_no': '2', 'case_no': 'CC/1/2024', 'parties': 'A vs B', 'court_name': 'Court Room 1'},
+            {'serial_no': '1', 'case_no': 'CC/1/2024', 'parties': 'A vs B', 'court_name': 'Court Room 2'},
+            {'serial_no': '2', 'case_no': 'CC/1/2024', 'parties': 'A vs B (IA)', 'court_name': 'Court Room 2'}
+        ]},
+        {'date': '2024-10-03', 'court': 'D', 'cases': [
+            {'serial_no': '1', 'case_no': 'CC/1/2024', 'parties': 'A vs B', 'court_name': 'Court Room 2'}
+        ]}
+    ]
+    delta = diff_cause_lists(rooms[0], rooms[1])
+    assert len(delta['added']) == 2 and len(delta['resequenced']) == 2
+    with tempfile.TemporaryDirectory() as root:
+        store = CauseListStore(root)
+        for cause_list in rooms:
+            store.save(cause_list)
+        for cause_list in rooms:
+            assert store.load('D', cause_list['date']) == cause_list
+    
+    # With a store set, downloaded lists go to it instead of the sink
+    with tempfile.TemporaryDirectory() as root:
+        scraper = ECourtsScraper(sink=open_sink(os.path.join(root, 'out.jsonl')))
+        scraper.cause_list_store = CauseListStore(os.path.join(root, 'store'))
+        assert scraper.download_cause_list('2024-10-01')['delta'] is None
+        assert scraper.download_cause_list('2024-10-02')['delta']['added'] == []
+        assert scraper.cause_list_store.dates('District Court') == ['2024-10-01', '2024-10-02']
+        scraper.sink.close()
+        assert not os.path.exists(os.path.join(root, 'out.jsonl'))
+
+def test_cause_list_index():
+    print("Testing cause list index...")
+    
+    index = CauseListIndex()
+    index.add({'date': '2024-10-01', 'court': 'C', 'cases': [
+        {'serial_no': '1', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar'}
+    ]})
+    index.add({'date': '2024-10-01', 'court': 'D', 'cases': [
+        {'serial_no': '3', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar'}
+    ]})
+    # A re-fetched list replaces the earlier copy even when the serial changed
+    index.add({'date': '2024-10-01', 'court': 'C', 'cases': [
+        {'serial_no': '7', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar'}
+    ]})
+    
+    history = index.case_history('CC/123/2024')
+    assert [(row['court'], row['serial_no']) for row in history] == [('C', '7'), ('D', '3')]
+    assert index.case_history('CC/123/2024', '2024-10-02') == []
+    assert index.has('2024-10-01', 'D') and not index.has('2024-10-02', 'D')
+
+def test_records_round_trip():
+    print("Testing compact records...")
+    
+    scraper = ECourtsScraper()
+    result = scraper.search_case_by_cnr("DLCT01-123456-2024")
+    result['case_details']['filing_date'] = '2024-01-05'
+    assert CaseRecord.from_dict(result).to_dict() == result
+    
+    cache = CaseCache()
+    cache.put('cnr:DLCT01-123456-2024', result)
+    assert isinstance(cache._entries['cnr:DLCT01-123456-2024'][1], CaseRecord)
+    assert cache.get('cnr:DLCT01-123456-2024') == result
+    restored = CaseCache()
+    restored.restore_state(cache.dump_state())
+    assert restored.get('cnr:DLCT01-123456-2024') == result
+    
+    cause_lists = [
+        {'date': '2024-10-01', 'court': 'District Court', 'cases': [
+            {'serial_no': '1', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar',
+             'cnr': 'DLCT010001232024'},
+            {'serial_no': '2A', 'case_no': 'CC/124/2024', 'parties': 'State vs Pintu Singh',
+             'court_name': 'Court Room 3'}
+        ]},
+        {'date': '2024-10-02', 'court': 'District Court', 'cases': [
+            {'serial_no': '4', 'case_no': 'CC/123/2024', 'parties': 'State vs Suresh Kumar'}
+        ]}
+    ]
+    store = CauseListColumns.from_cause_lists(cause_lists)
+    assert store.to_cause_lists() == cause_lists
+    assert [date for date, _, _ in store.find_case('CC/123/2024')] == ['2024-10-01', '2024-10-02']
+    
+    store.add_cause_list({'date': '2024-10-01', 'court': 'District Court', 'cases': []}, replace=True)
+    assert [date for date, _, _ in store.find_case('CC/123/2024')] == ['2024-10-02']
+    assert store.cause_list('2024-10-02', 'District Court') == cause_lists[1]
+
+def test_work_queue_leases():
+    print("Testing work queue leases...")
+    
+    courts = [{'state_code': '26', 'dist_code': '8', 'court': 'Court 1'},
+              {'state_code': '26', 'dist_code': '8', 'court': 'Court 2'}]
+    with tempfile.TemporaryDirectory() as root:
+        queue = WorkQueue(os.path.join(root, 'queue.db'), max_attempts=2)
+        assert queue.enqueue(cause_list_units(courts, ['2024-10-21'])) == 2
+        assert queue.enqueue(cause_list_units(courts, ['2024-10-21'])) == 0
+        
+        # An expired lease is reclaimed by another worker
+        assert len(queue.lease('a', lease_seconds=-1)) == 2
+        assert len(queue.lease('b', lease_seconds=-1)) == 2
+        assert queue.stats()['26/8'] == {'leased': 2}
+        # ...until max_attempts is used up
+        assert queue.lease('c') == []
+        assert queue.stats()['26/8'] == {'failed': 2}
+        
+        # Each court's cause list is fetched and saved separately
+        queue = WorkQueue(os.path.join(root, 'courts.db'))
+        queue.enqueue(cause_list_units(courts, ['2024-10-21']))
+        worker = CrawlWorker(queue, ECourtsScraper(sink=open_sink(f"json:{root}")), batch_size=1)
+        worker.run()
+        results = dict(queue.results())
+        assert sorted(r['data']['court'] for r in results.values()) == ['Court 1', 'Court 2']
+        assert len({r['filename'] for r in results.values()}) == 2
+
+def test_check_listings():
+    print("Testing batch listing checks...")
+    
+    scraper = ECourtsScraper()
+    result = scraper.check_listings(['DLCT01-123456-2024', 'CC/124/2024', 'CC/999/2024'], '2024-10-21')
+    cnr = result['results']['DLCT01-123456-2024']
+    assert cnr['case_no'] == 'CC/123/2024' and cnr['today']['listed']
+    assert result['results']['CC/124/2024']['tomorrow']['serial_no'] == '2'
+    assert not result['results']['CC/999/2024']['today']['listed']
+    assert 'error' in scraper.check_listings(['CC/124/2024'], '2024-13-01')
+    
+    # A malformed CNR is an error, not a case number that is "not listed"
+    assert scraper.check_listings(['DLCT01-12345-2024'])['results']['DLCT01-12345-2024'] == {'error': 'Invalid CNR'}
+    
+    # Single searches and batch checks read the same cause-list index
+    search = scraper.search_case_by_cnr('DLCT01-123456-2024')
+    batch = scraper.check_listings(['DLCT01-123456-2024'])['results']['DLCT01-123456-2024']
+    assert search['listing_info'] == {'today': batch['today'], 'tomorrow': batch['tomorrow']}
+    
+    # Each court's lists are fetched once; CNRs past the resolution cap are left for a retry
+    fetched = []
+    
+    class CountingScraper(ECourtsScraper):
+        def fetch_cause_list(self, date=None, court=None, state_code='', dist_code=''):
+            fetched.append((date, state_code, dist_code))
+            return super().fetch_cause_list(date, court, state_code, dist_code)
+    
+    scraper = CountingScraper()
+    scraper.routes = {'DLCT': {'state_code': '26', 'dist_code': '8'}, 'MHPU': {'state_code': '1', 'dist_code': '25'}}
+    scraper.max_cnr_resolutions = 2
+    result = scraper.check_listings(['DLCT01-123456-2024', 'DLCT01-123457-2024', 'MHPU01-000001-2024',
+                                     'CC/124/2024'], '2024-10-21')
+    checked = [f for f in fetched if f[0] in ('2024-10-21', '2024-10-22')]
+    assert sorted(checked) == sorted((day, state, dist) for day in ('2024-10-21', '2024-10-22')
+                                     for state, dist in [('26', '8'), ('1', '25'), ('', '')])
+    assert result['unresolved'] == 1 and result['results']['MHPU01-000001-2024']['unresolved']
+
+def test_request_scheduler():
+    print("Testing weighted fair queuing and the shared budget...")
+    
+    scheduler = RequestScheduler(budget=LocalBudget(rate=None, max_concurrent=1, reserve={}))
+    held = scheduler.acquire(BACKFILL)
+    order = []
+    
+    def request(priority):
+        with scheduler.slot(priority):
+            order.append(priority)
+    
+    threads = []
+    for priority in [BACKFILL] * 4 + [INTERACTIVE]:
+        threads.append(threading.Thread(target=request, args=(priority,)))
+        threads[-1].start()
+        # Queue them one at a time so arrival order is fixed
+        while sum(s['waiting'] for s in scheduler.stats().values()) < len(threads):
+            time.sleep(0.01)
+    scheduler.release(held)
+    for thread in threads:
+        thread.join()
+    # The interactive request queued last but goes ahead of the backlog
+    assert order == [INTERACTIVE] + [BACKFILL] * 4
+    
+    # Hedges only take a slot that is free right away, and waiting for admission
+    # is not counted as upstream latency
+    held = scheduler.acquire(INTERACTIVE)
+    assert scheduler.try_acquire(INTERACTIVE) is None
+    threading.Timer(0.2, scheduler.release, args=(held,)).start()
+    tracker = LatencyTracker(min_samples=1)
+    
+    def admit(hedge):
+        slot = scheduler.try_acquire() if hedge else scheduler.acquire()
+        return None if slot is None else lambda: scheduler.release(slot)
+    
+    assert hedged_call(lambda: 'ok', tracker, admit=admit) == 'ok'
+    assert tracker.percentile(100) < 0.1
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'budget.sqlite')
+        a = SqliteBudget(path, rate=None, max_concurrent=2, reserve={})
+        b = SqliteBudget(path, rate=None, max_concurrent=2, reserve={})
+        first, _ = a.try_acquire(INTERACTIVE)
+        second, _ = b.try_acquire(BACKFILL)
+        assert first and second and a.try_acquire(INTERACTIVE)[0] is None
+        b.release(second)
+        assert a.try_acquire(INTERACTIVE)[0] is not None
+        # Reserves keep headroom for interactive requests
+        c = SqliteBudget(os.path.join(tmp, 'reserve.sqlite'), rate=None, max_concurrent=3)
+        assert c.try_acquire(BACKFILL)[0] and c.try_acquire(BACKFILL)[0] is None
+        assert c.try_acquire(INTERACTIVE)[0]
+
+def test_journal_replay():
+    print("Testing journal replay and torn-tail recovery...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'crawl.journal')
+        calls = []
+        
+        def work(unit):
+            calls.append(unit)
+            return {'error': 'upstream down'} if unit == 'c' else {'unit': unit}
+        
+        units = [(u, u) for u in 'abc']
+        with CrawlJournal(path) as journal:
+            run_journaled(journal, units, work)
+        
+        # A killed run leaves a half-written record at the tail
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"op":"done","key":"c","res')
+        size = os.path.getsize(path)
+        
+        with CrawlJournal(path) as journal:
+            assert os.path.getsize(path) < size
+            assert journal.summary() == {'pending': 0, 'in_flight': 1, 'done': 2}
+            calls.clear()
+            results = run_journaled(journal, units, work)
+        # Finished units are replayed, the failed one is retried
+        assert calls == ['c']
+        assert results['a'] == {'unit': 'a'} and 'error' in results['c']
+        
+        with CrawlJournal(path) as journal:
+            journal.compact()
+        with CrawlJournal(path) as journal:
+            assert journal.remaining(['a', 'b', 'c']) == ['c']
+
+def test_cause_list_archive():
+    print("Testing binary cause list archive...")
+    
+    cause_lists = [
+        {'date': '2024-03-01', 'court': 'Court 1', 'cases': [
+            {'serial_no': '1', 'case_no': 'CC/123/2024', 'parties': 'A vs B', 'court_name': 'Court 1'},
+            {'serial_no': '2', 'case_no': 'CC/200/2024', 'parties': 'C vs D'}
+        ]},
+        {'date': '2024-03-05', 'court': 'Court 1', 'cases': [
+            {'serial_no': '4', 'case_no': 'CC/123/2024', 'parties': 'A vs B'}
+        ]},
+        {'date': '2024-03-09', 'court': 'Court 2', 'cases': [
+            {'serial_no': '1', 'case_no': 'CC/123/2024', 'parties': 'A vs B'}
+        ]}
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'causelists.bin')
+        assert write_archive(path, cause_lists)['records'] == 4
+        with CauseListArchive(path) as archive:
+            history = archive.case_history('CC/123/2024')
+            assert [r['date'] for r in history] == ['2024-03-01', '2024-03-05', '2024-03-09']
+            assert history[0]['court_name'] == 'Court 1' and 'court_name' not in history[1]
+            # Range bounds are inclusive at both ends
+            assert [r['date'] for r in archive.case_history('CC/123/2024', '2024-03-05', '2024-03-09')] == \
+                ['2024-03-05', '2024-03-09']
+            assert archive.case_history('CC/123/2024', '2024-03-02', '2024-03-04') == []
+            assert archive.case_history('CC/999/2024') == []
+            assert len(archive.between('2024-03-01')) == 2
+            assert len(archive.between('2024-02-01', '2024-12-31')) == 4
+            assert archive.covers('2024-03-09') and not archive.covers('2024-03-10')
+        
+        empty = os.path.join(tmp, 'empty.bin')
+        write_archive(empty, [])
+        with CauseListArchive(empty) as archive:
+            assert len(archive) == 0
+            assert archive.case_history('CC/123/2024') == []
+            assert archive.between('2024-03-01', '2024-03-31') == []
+            assert not archive.covers('2024-03-01')
+
+def test_cnr_normalization():
+    print("Testing CNR normalization and routing...")
+    
+    for raw in ['DLCT01-123456-2024', 'dlct011234562024', ' DLCT01 123456 2024 ', 'DLCT01/123456/2024']:
+        assert normalize_cnr(raw) == 'DLCT011234562024'
+    for raw in ['', None, 'DLCT01-12345-2024', 'DLCT01-123456-1900', '12CT01-123456-2024']:
+        assert normalize_cnr(raw) is None
+    
+    prepared = prepare_cnrs(['DLCT01-123456-2024', 'bogus', 'dlct011234562024', 'MHPU02-000001-2023'])
+    assert prepared == {'valid': ['DLCT011234562024', 'MHPU020000012023'], 'invalid': ['bogus'], 'duplicates': 1}
+    
+    routes = {'DL': {'state_code': '26'}, 'DLCT': {'state_code': '26', 'dist_code': '8'}}
+    assert establishment_route('DLCT011234562024', routes) == {'state_code': '26', 'dist_code': '8'}
+    assert establishment_route('DLND011234562024', routes) == {'state_code': '26', 'dist_code': ''}
+    assert establishment_route('MHPU020000012023', routes) == {'state_code': '', 'dist_code': ''}
+
+def test_aimd_limiter():
+    print("Testing AIMD concurrency limiter...")
+    
+    limiter = AIMDLimiter(initial=4, max_limit=5, latency_target=1.0)
+    for _ in range(4):
+        limiter.record(0.1)
+    assert limiter.limit == 5
+    for _ in range(5):
+        limiter.record(0.1)
+    assert limiter.limit == 5
+    
+    # The first overload halves the limit, the rest of the burst does not
+    limiter.record(0.1, overloaded=True)
+    limiter.record(0.1, overloaded=True)
+    assert limiter.limit == 2 and limiter.metrics()['decreases'] == 1
+    # Slow calls count as overload once a window has passed
+    limiter.record(2.0)
+    assert limiter.limit == 1
+    limiter.record(2.0, overloaded=True)
+    limiter.record(2.0, overloaded=True)
+    assert limiter.limit == 1
+    
+    limiter.acquire()
+    entered = threading.Event()
+    
+    def worker():
+        with limiter:
+            entered.set()
+    
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not entered.wait(0.1)
+    limiter.release()
+    thread.join()
+    assert entered.is_set() and limiter.metrics()['in_flight'] == 0
+    
+    # Bulk runs report the current limit while they are in progress
+    scraper = ECourtsScraper()
+    scraper.report_interval = 0.02
+    stream = io.StringIO()
+    with redirect_stdout(stream):
+        scraper._run_bulk(None, [('a', 1), ('b', 2)], lambda unit: time.sleep(0.1))
+    assert 'concurrency limit 4, in flight 2' in stream.getvalue()
+
+def test_parse_page_text():
+    print("Testing PDF cause list page parsing...")
+    
+    page1 = """District Court Delhi - Cause List
+Court Room No. 3
+1  CC/135/2024  State vs Abhinav Sharma
+2. CS 12/2023 Ram v. Shyam
+3  Crl.A. 45/2022  Ramesh vs State
+Courtroom 4 - Shri X, ACJM
+6  CS DJ 123/2023  Mohan vs Sohan
+7  Bail Appln. 5/2024  Rakesh vs State
+8  Adjourned sine die
+Page 1 of 2"""
+    page2 = """9  MACT 77/2021  Sunita vs Insurance Co.
+COURT NO 12
+10  cc 9/2024  State vs Kamal"""
+    
+    rows, court, unparsed = parse_page_text(page1)
+    assert [r['case_no'] for r in rows] == ['CC/135/2024', 'CS/12/2023', 'Crl.A./45/2022',
+                                            'CS DJ/123/2023', 'Bail Appln./5/2024']
+    assert [r['court_name'] for r in rows] == ['Court Room No. 3'] * 3 + ['Courtroom 4 - Shri X, ACJM'] * 2
+    assert rows[3]['parties'] == 'Mohan vs Sohan'
+    assert court == 'Courtroom 4 - Shri X, ACJM'
+    assert unparsed == ['8  Adjourned sine die']
+    
+    # Rows before the first header on a page belong to the previous page's court
+    skipped = []
+    merged = list(merge_pages([parse_page_text(page1), parse_page_text(page2)], skipped))
+    assert merged[5]['case_no'] == 'MACT/77/2021' and merged[5]['court_name'] == 'Courtroom 4 - Shri X, ACJM'
+    assert merged[6]['court_name'] == 'COURT NO 12'
+    assert skipped == ['8  Adjourned sine die']
+
+def test_listing_scheduler():
+    print("Testing listing precompute per court...")
+    
+    down = set()
+    
+    class CourtScraper(ECourtsScraper):
+        def fetch_cause_list(self, date=None, court=None, state_code='', dist_code=''):
+            if state_code in down:
+                raise ConnectionError('court list unavailable')
+            return {'date': date, 'court': f'Court {state_code}', 'cases': [
+                {'serial_no': '4', 'case_no': f'CC/{state_code}/2024', 'parties': 'A vs B'}
+            ]}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'watchlist.txt')
+        with open(path, 'w') as f:
+            f.write("CC/1/2024, 1, 10  # district court\nCC/2/2024, 2, 20\nCC/9/2024, 2, 20\nCC//2024\n")
+        watchlist = load_watchlist(path)
+    assert watchlist[0] == ('CC/1/2024', '1', '10') and watchlist[3] == ('CC//2024', '', '')
+    
+    today = datetime.now().strftime('%Y-%m-%d')
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    scheduler = ListingScheduler(scraper=CourtScraper())
+    scheduler.set_watchlist(watchlist)
+    down.add('2')
+    result = scheduler.precompute(tomorrow)
+    assert 'error' in result and result['cases'] == 2
+    assert scheduler.lookup('CC/1/2024', tomorrow)['serial_no'] == '4'
+    assert scheduler.lookup('CC//2024', tomorrow)['serial_no'] == '4'
+    # No "not listed" for cases whose court list was never fetched
+    assert scheduler.lookup('CC/9/2024', tomorrow) is None
+    assert not scheduler._covers(tomorrow)
+    
+    down.clear()
+    assert scheduler.precompute(tomorrow)['courts'] == 3
+    assert scheduler.lookup('CC/2/2024', tomorrow)['listed']
+    assert scheduler.lookup('CC/9/2024', tomorrow) == {'listed': False, 'serial_no': None, 'court_name': None}
+    assert scheduler._covers(tomorrow)
+    assert scheduler.lookup('CC/555/2024', tomorrow) is None
+    
+    # Restored tables cover the same watchlist; a changed watchlist is recomputed
+    scheduler.precompute(today)
+    restored = ListingScheduler(scraper=CourtScraper())
+    restored.set_watchlist(watchlist)
+    restored.restore_state(json.loads(json.dumps(scheduler.dump_state())))
+    assert restored._covers(today)
+    assert restored.listing_info('CC/2/2024', today, tomorrow)['tomorrow']['serial_no'] == '4'
+    restored.watch('CC/3/2024', state_code='3')
+    assert not restored._covers(today)
+
+def test_listing_window():
+    print("Testing date-window listing checks...")
+    
+    fetched = []
+    
+    class CountingScraper(ECourtsScraper):
+        def fetch_cause_list(self, date=None, court=None, state_code='', dist_code=''):
+            fetched.append(date)
+            return super().fetch_cause_list(date, court, state_code, dist_code)
+    
+    today = datetime.now()
+    start = (today - timedelta(days=5)).strftime('%Y-%m-%d')
+    end = (today + timedelta(days=3)).strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'window.journal')
+        with CrawlJournal(path) as journal:
+            window = CountingScraper().check_listing_window('CC/123/2024', start, end, journal)
+        # Nothing after tomorrow is published yet
+        assert window['fetched_dates'] == 7 and len(window['listings']) == 7
+        
+        # Past lists come back from the journal; today's and tomorrow's are fetched again
+        fetched.clear()
+        with CrawlJournal(path) as journal:
+            window = CountingScraper().check_listing_window('CC/123/2024', start, end, journal)
+        assert window['replayed_dates'] == 5 and window['fetched_dates'] == 2
+        assert sorted(fetched) == [today.strftime('%Y-%m-%d'), (today + timedelta(days=1)).strftime('%Y-%m-%d')]
+        assert len(window['listings']) == 7
+
+def test_resilience():
+    print("Testing hedged calls and circuit breaker...")
+    
+    def flaky(*outcomes):
+        # Each call takes the next (delay, result); exceptions are raised
+        calls = []
+        lock = threading.Lock()
+        
+        def fn():
+            with lock:
+                delay, outcome = outcomes[len(calls)]
+                calls.append(outcome)
+            time.sleep(delay)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return fn, calls
+    
+    # A call running past the tracked p95 gets a hedge, and the faster one wins
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record(0.02)
+    fn, calls = flaky((1.0, 'slow'), (0, 'hedge'))
+    started = time.monotonic()
+    assert hedged_call(fn, tracker) == 'hedge'
+    assert len(calls) == 2 and time.monotonic() - started < 0.5
+    
+    # A fast failure is replaced by a retry even before any latency history exists
+    fn, calls = flaky((0, ValueError('reset')), (0, 'ok'))
+    assert hedged_call(fn, LatencyTracker()) == 'ok' and len(calls) == 2
+    
+    # When every attempt fails the last error is raised
+    fn, calls = flaky((0, ValueError('first')), (0, ValueError('second')))
+    try:
+        hedged_call(fn, LatencyTracker())
+        assert False, 'expected ValueError'
+    except ValueError as e:
+        assert str(e) == 'second' and len(calls) == 2
+    
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    
+    def fail():
+        raise ValueError('upstream down')
+    
+    for _ in range(2):
+        try:
+            breaker.call(fail)
+        except ValueError:
+            pass
+    assert breaker.state == 'open'
+    try:
+        breaker.call(lambda: 'ok')
+        assert False, 'expected CircuitOpenError'
+    except CircuitOpenError:
+        pass
+    
+    # After reset_timeout one trial call goes through; a failed trial re-opens
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == 'half_open' and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    time.sleep(0.06)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+def test_transport_replay():
+    print("Testing record/replay transport...")
+    
+    class ScriptedTransport(Transport):
+        def __init__(self):
+            self.calls = 0
+        
+        def request(self, method, url, data=None, timeout=30):
+            self.calls += 1
+            if url.endswith('/slow'):
+                raise requests.Timeout('read timed out')
+            return TransportResponse(200, f'reply {self.calls}'.encode(), {'X-Call': str(self.calls)}, url)
+    
+    try:
+        Transport()
+        assert False, 'Transport is abstract'
+    except TypeError:
+        pass
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = os.path.join(tmp, 'run.cassette.gz')
+        recorder = RecordingTransport(cassette, inner=ScriptedTransport(), flush_every=1)
+        assert recorder.post('https://x/case', {'cnr': 'A'}).text == 'reply 1'
+        assert recorder.post('https://x/case', {'cnr': 'A'}).text == 'reply 2'
+        try:
+            recorder.post('https://x/slow')
+            assert False, 'expected Timeout'
+        except requests.Timeout:
+            pass
+        recorder.close()
+        
+        # A run killed mid-flush leaves a torn gzip member after the complete ones
+        with open(cassette, 'ab') as f:
+            f.write(gzip.compress(b'{"method":"POST","url":"https://x/torn"}\n')[:20])
+        
+        replay = ReplayTransport(cassette)
+        assert replay.post('https://x/case', {'cnr': 'A'}).text == 'reply 1'
+        assert replay.post('https://x/case', {'cnr': 'A'}).headers == {'X-Call': '2'}
+        # Recordings ran out: the last one is reused
+        assert replay.post('https://x/case', {'cnr': 'A'}).text == 'reply 2'
+        # Recorded timeouts fail the same way on replay
+        try:
+            replay.post('https://x/slow')
+            assert False, 'expected Timeout'
+        except requests.Timeout as e:
+            assert 'read timed out' in str(e)
+        for url in ('https://x/torn', 'https://x/other'):
+            try:
+                replay.post(url)
+                assert False, 'expected ReplayMissError'
+            except ReplayMissError:
+                pass
+
+def test_pdf_archive():
+    print("Testing PDF archive...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = PdfArchive(os.path.join(tmp, 'archive'))
+        order = b'%PDF-1.4 order of 2024-10-01' * 50
+        first = archive.put(order, 'DLCT01-123456-2024', 'order', '2024-10-01')
+        # Identical bytes for another case are stored once
+        second = archive.put(order, 'MHPU02-000001-2023', 'order', '2024-10-02')
+        assert first['new_blob'] and not second['new_blob'] and first['sha256'] == second['sha256']
+        archive.put(b'%PDF-1.4 judgment', 'DLCT011234562024', 'judgment', '2024-10-03')
+        assert archive.get(first['sha256']) == order
+        stats = archive.stats()
+        assert stats['documents'] == 3 and stats['blobs'] == 2 and stats['stored_bytes'] < stats['bytes']
+        
+        # The manifest is keyed on the canonical CNR however it was written
+        entries = archive.lookup('dlct01 123456 2024')
+        assert [(e['cnr'], e['document']) for e in entries] == [('DLCT011234562024', 'judgment'),
+                                                                 ('DLCT011234562024', 'order')]
+        assert [e['date'] for e in archive.list(since='2024-10-02')] == ['2024-10-03', '2024-10-02']
+        try:
+            archive.put(order, 'test_case')
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+        
+        # Links need a verified earlier export; otherwise export copies
+        dest = os.path.join(tmp, 'out', 'order.pdf')
+        assert archive.export(first['sha256'], dest, 'hardlink') == 'copy'
+        with open(dest, 'rb') as f:
+            assert f.read() == order
+        stale = os.path.join(tmp, 'stale.pdf')
+        with open(stale, 'wb') as f:
+            f.write(b'other bytes')
+        assert archive.export(first['sha256'], os.path.join(tmp, 'b.pdf'), 'hardlink', stale) == 'copy'
+        assert archive.export(first['sha256'], os.path.join(tmp, 'c.pdf'), 'hardlink', dest) in ('hardlink', 'copy')
+        
+        # The scraper archives under the case's CNR, and saves a file when none is known
+        scraper = ECourtsScraper()
+        scraper.pdf_archive = archive
+        result = scraper.download_case_pdf('case-7', 'DLCT01-000777-2024')
+        assert result['cnr'] == 'DLCT010007772024' and archive.lookup('DLCT010007772024')
+        scraper.sink = open_sink(f'json:{tmp}')
+        result = scraper.download_case_pdf('test_case')
+        assert 'sha256' not in result and os.path.exists(result['filename'])
+        assert all(e['cnr'] != 'test_case' for e in archive.list())
+        archive.close()
+
+def test_snapshots():
+    print("Testing snapshots...")
+    
+    today = datetime.now().strftime('%Y-%m-%d')
+    cached = ECourtsScraper().search_case_by_cnr('DLCT01-123456-2024')
+    
+    def sources(snapshots):
+        cache = CaseCache()
+        listings = ListingScheduler(scraper=ECourtsScraper())
+        snapshots.register('case_cache', cache.dump_state, cache.restore_state)
+        snapshots.register('listings', listings.dump_state, listings.restore_state)
+        return cache, listings
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'state.snapshot')
+        snapshots = SnapshotManager(path)
+        cache, listings = sources(snapshots)
+        cache.put('cnr:DLCT011234562024', cached)
+        listings.table[today] = {'CC/123/2024': {'listed': True, 'serial_no': '15', 'court_name': 'Room 1'}}
+        assert snapshots.save()['sources'] == ['case_cache', 'listings']
+        
+        restored = SnapshotManager(path)
+        cache, listings = sources(restored)
+        assert restored.restore() == ['case_cache', 'listings']
+        assert cache.get('cnr:DLCT011234562024') == cached
+        assert listings.lookup('CC/123/2024', today)['serial_no'] == '15'
+        
+        # Snapshots older than max_age are ignored as a whole
+        stale = SnapshotManager(path, max_age=60)
+        cache, _ = sources(stale)
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        payload['created'] -= 120
+        with open(path, 'wb') as f:
+            pickle.dump(payload, f)
+        assert stale.restore() == [] and len(cache) == 0
+        
+        # A torn or corrupt snapshot means a cold start, not a crash
+        with open(path, 'wb') as f:
+            f.write(b'not a pickle')
+        assert SnapshotManager(path).restore() == []
+        assert SnapshotManager(os.path.join(tmp, 'missing.snapshot')).restore() == []
+
+def test_sinks():
+    print("Testing output sinks...")
+    
+    records = [{'case_no': f'CC/{i}/2024', 'parties': 'State vs Meera Iyer'} for i in range(5)]
+    
+    def read_lines(opener, path):
+        with opener(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+    
+    try:
+        OutputSink()
+        assert False, 'OutputSink is abstract'
+    except TypeError:
+        pass
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Records are held until a batch fills, and the rest are written on close
+        path = os.path.join(tmp, 'out.jsonl')
+        sink = open_sink(path)
+        sink.batch_size = 3
+        for record in records[:2]:
+            assert sink.write(record, 'case') == path
+        assert not os.path.exists(path)
+        sink.write(records[2], 'case')
+        assert len(read_lines(open, path)) == 3
+        for record in records[3:]:
+            sink.write(record, 'case')
+        sink.close()
+        lines = read_lines(open, path)
+        assert [line['data'] for line in lines] == records
+        assert lines[0]['kind'] == 'result' and lines[0]['name'] == 'case'
+        
+        # Each flush appends a gzip member; they read back as one stream
+        path = os.path.join(tmp, 'out.jsonl.gz')
+        sink = open_sink(path)
+        sink.batch_size = 2
+        for record in records:
+            sink.write(record, 'case', kind='case')
+        sink.close()
+        assert [line['data'] for line in read_lines(gzip.open, path)] == records
+        
+        path = os.path.join(tmp, 'out.sqlite')
+        with open_sink(f'sqlite:{path}') as sink:
+            sink.batch_size = 2
+            for record in records:
+                sink.write(record, 'case')
+            assert sink.write_bytes(b'%PDF-1.4', 'case.pdf') == f'{path}:case.pdf'
+        conn = sqlite3.connect(path)
+        rows = conn.execute('SELECT kind, name, data FROM results ORDER BY id').fetchall()
+        assert [json.loads(data) for _, _, data in rows] == records and rows[0][:2] == ('result', 'case')
+        assert conn.execute('SELECT data FROM attachments').fetchone()[0] == b'%PDF-1.4'
+        conn.close()
+        
+        filename = open_sink(f'json:{tmp}').write(records[0], 'case.json')
+        with open(filename) as f:
+            assert json.load(f) == records[0]
+    
+    stream = io.StringIO()
+    with redirect_stdout(stream):
+        sink = StdoutSink(batch_size=2)
+    for record in records:
+        assert sink.write(record, 'case') == '<stdout>'
+    assert len(stream.getvalue().splitlines()) == 4
+    sink.close()
+    assert [json.loads(line)['data'] for line in stream.getvalue().splitlines()] == records
+
 if __name__ == "__main__":
-    test_scraper()
\ No newline at end of file
+    test_scraper()
+    test_sinks()
+    test_cause_list_diff()
+    test_cause_list_index()
+    test_records_round_trip()
+    test_work_queue_leases()
+    test_check_listings()
+    test_request_scheduler()
+    test_transport_replay()
+    test_resilience()
+    test_journal_replay()
+    test_cause_list_archive()
+    test_pdf_archive()
+    test_cnr_normalization()
+    test_aimd_limiter()
+    test_parse_page_text()
+    test_listing_scheduler()
+    test_snapshots()
+    test_listing_window()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+HTTP transports for the scraper: requests, HTTP/2 (httpx) and record/replay
+"""
+
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # optional, only needed for Http2Transport
+    httpx = None
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+class UpstreamError(Exception):
+    """Raised for 5xx responses from eCourts"""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class ReplayMissError(Exception):
+    """Raised when a replayed request has no matching recording"""
+
+
+class TransportResponse:
+    """Minimal response object shared by all transports"""
+
+    def __init__(self, status_code, content, headers=None, url=''):
+        self.status_code = status_code
+        self.content = content
+        self.headers = dict(headers or {})
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Transport(ABC):
+    """Base transport: send a request, return a TransportResponse"""
+
+    @abstractmethod
+    def request(self, method, url, data=None, timeout=30):
+        """Send one request and return a TransportResponse"""
+
+    def post(self, url, data=None, timeout=30):
+        return self.request('POST', url, data=data, timeout=timeout)
+
+    def get(self, url, timeout=30):
+        return self.request('GET', url, timeout=timeout)
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """HTTP/1.1 transport on a requests.Session (the default)"""
+
+    def __init__(self, session=None):
+        self.session = session or requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+
+    def request(self, method, url, data=None, timeout=30):
+        response = self.session.request(method, url, data=data, timeout=timeout)
+        return TransportResponse(response.status_code, response.content, response.headers, response.url)
+
+    def close(self):
+        self.session.close()
+
+
+class Http2Transport(Transport):
+    """HTTP/2 transport multiplexing requests over one connection per host (needs httpx[http2])"""
+
+    def __init__(self, max_connections=10):
+        if httpx is None:
+            raise ImportError("Http2Transport requires httpx: pip install 'httpx[http2]'")
+        self.client = httpx.Client(
+            http2=True,
+            headers={'User-Agent': USER_AGENT},
+            limits=httpx.Limits(max_connections=max_connections)
+        )
+
+    def request(self, method, url, data=None, timeout=30):
+        response = self.client.request(method, url, data=data, timeout=timeout)
+        return TransportResponse(response.status_code, response.content, response.headers, str(response.url))
+
+    def close(self):
+        self.client.close()
+
+
+def _request_key(method, url, data):
+    return json.dumps([method, url, sorted((data or {}).items())])
+
+
+def _error_kind(error):
+    """Classify a transport exception for the cassette"""
+    timeouts = (requests.Timeout, TimeoutError) + ((httpx.TimeoutException,) if httpx else ())
+    connection = (requests.ConnectionError, ConnectionError) + ((httpx.NetworkError,) if httpx else ())
+    if isinstance(error, timeouts):
+        return 'timeout'
+    if isinstance(error, connection):
+        return 'connection'
+    return 'error'
+
+
+_REPLAYED_ERRORS = {
+    'timeout': requests.Timeout,
+    'connection': requests.ConnectionError,
+    'error': requests.RequestException
+}
+
+
+class RecordingTransport(Transport):
+    """Pass requests to an inner transport and record every exchange to a gzip cassette.
+
+    Entries are written as a complete gzip member every `flush_every` entries
+    or `flush_interval` seconds, so a killed recording run loses at most the
+    last unflushed batch and the cassette stays readable. Timeouts and
+    connection errors are recorded too, and replayed as the same failure.
+    """
+
+    def __init__(self, cassette, inner=None, flush_every=20, flush_interval=1.0):
+        self.cassette = cassette
+        self.inner = inner or RequestsTransport()
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._file = open(cassette, 'ab')
+        self._pending = []
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, data=None, timeout=30):
+        start = time.monotonic()
+        entry = {'method': method, 'url': url, 'data': data}
+        try:
+            response = self.inner.request(method, url, data=data, timeout=timeout)
+        except Exception as e:
+            entry.update({'error': _error_kind(e), 'message': str(e), 'elapsed': time.monotonic() - start})
+            self._record(entry)
+            raise
+        entry.update({
+            'status_code': response.status_code,
+            'headers': response.headers,
+            'body': base64.b64encode(response.content).decode('ascii'),
+            'elapsed': time.monotonic() - start
+        })
+        self._record(entry)
+        return response
+
+    def _record(self, entry):
+        with self._lock:
+            self._pending.append(json.dumps(entry, separators=(',', ':')) + '\n')
+            if (len(self._pending) >= self.flush_every
+                    or time.monotonic() - self._flushed_at >= self.flush_interval):
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._file.write(gzip.compress(''.join(self._pending).encode('utf-8')))
+            self._file.flush()
+            self._pending = []
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self.inner.close()
+
+
+class ReplayTransport(Transport):
+    """Serve responses from a cassette written by RecordingTransport.
+
+    Matching requests are answered in recorded order; the last recording is
+    reused once a request's recordings run out. With realtime=True replay
+    sleeps for the recorded latency instead of answering immediately.
+    """
+
+    def __init__(self, cassette, realtime=False):
+        self.realtime = realtime
+        self._recordings = defaultdict(deque)
+        self._last = {}
+        self._lock = threading.Lock()
+        with gzip.open(cassette, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    # A recording run killed mid-write leaves an unterminated line
+                    if not line.endswith('\n'):
+                        break
+                    if line.strip():
+                        entry = json.loads(line)
+                        key = _request_key(entry['method'], entry['url'], entry['data'])
+                        self._recordings[key].append(entry)
+            except (EOFError, gzip.BadGzipFile):
+                pass  # truncated final gzip member
+
+    def request(self, method, url, data=None, timeout=30):
+        key = _request_key(method, url, data)
+        with self._lock:
+            queue = self._recordings.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+            elif key in self._last:
+                entry = self._last[key]
+            else:
+                raise ReplayMissError(f"No recording for {method} {url}")
+        if self.realtime:
+            time.sleep(min(entry.get('elapsed', 0), timeout))
+        if 'error' in entry:
+            raise _REPLAYED_ERRORS.get(entry['error'], requests.RequestException)(entry['message'])
+        return TransportResponse(entry['status_code'], base64.b64decode(entry['body']),
+                                 entry['headers'], entry['url'])
+
+
+def open_transport(http2=False, record=None, replay=None):
+    """Build a transport from CLI-style options"""
+    if replay:
+        return ReplayTransport(replay)
+    transport = Http2Transport() if http2 else RequestsTransport()
+    if record:
+        transport = RecordingTransport(record, inner=transport)
+    return transport
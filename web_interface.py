@@ -5,9 +5,53 @@ Simple web interface for eCourts Scraper (Bonus feature)
 
 from flask import Flask, request, jsonify, render_template_string
 from ecourts_scraper import ECourtsScraper
+from listing_scheduler import ListingScheduler, load_watchlist
+from case_cache import CaseCache
+from concurrency import AIMDLimiter
+from cnr_utils import load_routes
+from snapshots import SnapshotManager
+from priority_scheduler import shared_scheduler
+from pathlib import Path
+from datetime import datetime
+import atexit
 import json
+import signal
+import sys
 
 app = Flask(__name__)
+# Callable building each request's scraper; load tests set a stub here
+app.config['SCRAPER_FACTORY'] = ECourtsScraper
+
+# Upper bound on identifiers accepted by /api/listings in one request
+MAX_LISTINGS_BATCH = 5000
+
+# CNR prefix -> eCourts state_code/dist_code, so listings are checked against each court's list
+ROUTES_FILE = 'routes.json'
+routes = None
+
+# One adaptive bulk concurrency limit for every request, reported by /api/status
+bulk_limiter = AIMDLimiter()
+
+# Precomputed listings for watched cases, filled each evening in the background
+WATCHLIST_FILE = 'watchlist.txt'
+listing_scheduler = ListingScheduler()
+listing_scheduler.scraper.limiter = bulk_limiter
+
+# Case results shared across requests; saved with the listings so restarts start warm
+SNAPSHOT_FILE = 'web_state.snapshot'
+case_cache = CaseCache()
+snapshots = SnapshotManager(SNAPSHOT_FILE)
+snapshots.register('case_cache', case_cache.dump_state, case_cache.restore_state)
+snapshots.register('listings', listing_scheduler.dump_state, listing_scheduler.restore_state)
+
+def new_scraper():
+    """Scraper wired to the shared listing table, case cache and CNR routes"""
+    scraper = app.config['SCRAPER_FACTORY']()
+    scraper.listing_table = listing_scheduler
+    scraper.case_cache = case_cache
+    scraper.routes = routes
+    scraper.limiter = bulk_limiter
+    return scraper
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -446,7 +490,7 @@ def index():
 def api_search():
     try:
         data = request.get_json()
-        scraper = ECourtsScraper()
+        scraper = new_scraper()
         
         if data['method'] == 'cnr':
             result = scraper.search_case_by_cnr(data['cnr'])
@@ -456,7 +500,7 @@ def api_search():
             )
         
         if data.get('download_pdf') and 'error' not in result:
-            pdf_result = scraper.download_case_pdf("web_case")
+            pdf_result = scraper.download_case_pdf("web_case", result.get('cnr'))
             result['pdf_download'] = pdf_result
         
         return jsonify(result)
@@ -466,15 +510,63 @@ def api_search():
 @app.route('/api/causelist', methods=['POST'])
 def api_causelist():
     try:
-        scraper = ECourtsScraper()
+        scraper = new_scraper()
         result = scraper.download_cause_list()
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/listings', methods=['POST'])
+def api_listings():
+    try:
+        data = request.get_json()
+        cases = data.get('cases') if isinstance(data, dict) else None
+        if not isinstance(cases, list) or not cases:
+            return jsonify({'error': "Provide 'cases': a list of CNRs or case numbers"}), 400
+        if len(cases) > MAX_LISTINGS_BATCH:
+            return jsonify({'error': f'At most {MAX_LISTINGS_BATCH} cases per request'}), 400
+        if data.get('date'):
+            try:
+                datetime.strptime(data['date'], '%Y-%m-%d')
+            except (TypeError, ValueError):
+                return jsonify({'error': "'date' must be YYYY-MM-DD"}), 400
+        
+        scraper = new_scraper()
+        result = scraper.check_listings(cases, data.get('date'))
+        if 'error' in result:
+            return jsonify(result), 502
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/status')
+def api_status():
+    """Bulk concurrency limit and upstream request queues, for operators"""
+    return jsonify({
+        'bulk_limiter': bulk_limiter.metrics(),
+        'upstream': shared_scheduler().stats(),
+        'cached_cases': len(case_cache),
+        'watched_cases': len(listing_scheduler.watched)
+    })
+
 if __name__ == '__main__':
     print("Starting eCourts Scraper Web Interface...")
     print("Open http://localhost:5001 in your browser")
     print("eCourts India Case Search & Cause List Downloader")
     print("Features: CNR Search, Case Details, PDF Download, Cause Lists")
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    restored = snapshots.restore()
+    if restored:
+        print(f"Warm start: restored {', '.join(restored)} from {SNAPSHOT_FILE}")
+    snapshots.start()
+    atexit.register(snapshots.stop)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if Path(ROUTES_FILE).exists():
+        routes = load_routes(ROUTES_FILE)
+    if Path(WATCHLIST_FILE).exists():
+        listing_scheduler.set_watchlist(load_watchlist(WATCHLIST_FILE))
+    if listing_scheduler.watched:
+        listing_scheduler.start()
+        print(f"Precomputing listings for {len(listing_scheduler.watched)} watched cases")
+    # No reloader: it would run this block again in a child process, with two
+    # schedulers and two snapshot writers racing on the same file
+    app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5001)
\ No newline at end of file